@@ -1,4 +1,25 @@
+import argparse
+import array
+import base64
+import hashlib
+import hmac
 import math
+import mmap
+import os
+import random
+import secrets
+import string
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional - every cipher has a pure Python path
+    np = None
 """
 CRYPTOGRAPHY FUNCTIONS
 ======================
@@ -15,6 +36,49 @@ detailed comments for implementing the other ciphers.
 # CAESAR CIPHER - FULLY IMPLEMENTED
 # =============================================================================
 
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# One translation table per possible shift (0-25), built once at import.
+# Table k maps A -> ALPHABET[k], B -> ALPHABET[k+1], ... wrapping at Z.
+_CAESAR_TABLES = [
+    str.maketrans(ALPHABET, ALPHABET[shift:] + ALPHABET[:shift])
+    for shift in range(26)
+]
+
+class CaesarKey:
+    """
+    CAESAR KEY
+    ==========
+    
+    A shift compiled once into its encrypt and decrypt translation tables.
+    Keep one around to encrypt many texts with the same shift;
+    caesar_encrypt() and caesar_decrypt() use the 26 shared ones below.
+    
+    __slots__ stops Python giving every object its own attribute dict,
+    so a key is just its three fields.
+    """
+    __slots__ = ('shift', '_encrypt_table', '_decrypt_table')
+
+    def __init__(self, shift):
+        self.shift = shift % 26
+        self._encrypt_table = _CAESAR_TABLES[self.shift]
+        self._decrypt_table = _CAESAR_TABLES[-self.shift % 26]
+
+    def encrypt(self, plain_text):
+        """
+        Uppercase the text and shift every letter A-Z.
+        """
+        return plain_text.upper().translate(self._encrypt_table)
+
+    def decrypt(self, cipher_text):
+        """
+        Uppercase the text and shift every letter back.
+        """
+        return cipher_text.upper().translate(self._decrypt_table)
+
+# One compiled key per possible shift, shared by the functions below
+_CAESAR_KEYS = [CaesarKey(shift) for shift in range(26)]
+
 def caesar_encrypt(plain_text, shift_key):
     """
     CAESAR CIPHER ENCRYPTION
@@ -36,41 +100,15 @@ def caesar_encrypt(plain_text, shift_key):
     - str: The encrypted text
     """
     
-    # Convert the input to uppercase for consistency
-    # This makes our cipher case-insensitive
-    plain_text = plain_text.upper()
-    
-    # This will store our encrypted result
-    encrypted_text = ""
-    
-    # Process each character in the input text
-    for char in plain_text:
-        
-        # Check if the character is a letter (A-Z)
-        if char.isalpha():
-            
-            # Convert letter to number (A=0, B=1, C=2, ..., Z=25)
-            # ord() gives us the ASCII value, ord('A') = 65
-            # So ord(char) - ord('A') gives us 0-25
-            char_position = ord(char) - ord('A')
-            
-            # Apply the Caesar cipher formula
-            # The % 26 ensures we wrap around (Z+1 becomes A)
-            new_position = (char_position + shift_key) % 26
-            
-            # Convert back to a letter
-            # chr() converts a number back to its ASCII character
-            encrypted_char = chr(new_position + ord('A'))
-            
-            # Add the encrypted character to our result
-            encrypted_text += encrypted_char
-            
-        else:
-            # If it's not a letter (space, punctuation, number),
-            # keep it unchanged
-            encrypted_text += char
-    
-    return encrypted_text
+    # The text is converted to uppercase for consistency, which makes our
+    # cipher case-insensitive.
+    #
+    # Instead of shifting one character at a time, the compiled key for
+    # this shift looks up its precomputed table (see _CAESAR_TABLES above).
+    # str.translate() then replaces every A-Z in a single pass, and
+    # anything that isn't in the table (spaces, punctuation, numbers)
+    # is kept unchanged.
+    return _CAESAR_KEYS[shift_key % 26].encrypt(plain_text)
 
 def caesar_decrypt(cipher_text, shift_key):
     """
@@ -92,7 +130,7 @@ def caesar_decrypt(cipher_text, shift_key):
     
     # Decryption is just encryption with a negative shift!
     # If we encrypted with +3, we decrypt with -3
-    return caesar_encrypt(cipher_text, -shift_key)
+    return _CAESAR_KEYS[shift_key % 26].decrypt(cipher_text)
 
 # =============================================================================
 # HELPER FUNCTIONS FOR FUTURE CIPHERS
@@ -122,11 +160,21 @@ def extended_gcd(a, b):
     
     Helper function for finding modular inverses.
     Returns (gcd, x, y) where ax + by = gcd(a, b)
+    
+    This runs the same steps as gcd() above, but also keeps track of how
+    to write each remainder as a combination of a and b. Using a loop
+    instead of recursion means huge numbers can't hit Python's recursion
+    limit.
     """
-    if b == 0:
-        return (a, 1, 0)
-    g, x, y = extended_gcd(b, a % b)
-    return (g, y, x - (a // b) * y)
+    old_r, r = a, b # Remainders
+    old_x, x = 1, 0 # Coefficients of a
+    old_y, y = 0, 1 # Coefficients of b
+    while r:
+        quotient = old_r // r
+        old_r, r = r, old_r - quotient * r
+        old_x, x = x, old_x - quotient * x
+        old_y, y = y, old_y - quotient * y
+    return (old_r, old_x, old_y)
     
 def mod_inverse(a, m):
     """
@@ -146,10 +194,89 @@ def mod_inverse(a, m):
         return None
     return x % m
 
+def mod_inverse_batch(values, m):
+    """
+    BATCH MODULAR INVERSE (Montgomery's trick)
+    ==========================================
+    
+    Find the inverse of every number in 'values' modulo m using only ONE
+    call to mod_inverse(), plus about 3 multiplications per number.
+    
+    The idea: if P = v1 * v2 * ... * vk, then 1/vi = (product of all the
+    other values) / P. So we:
+    1. Compute the running products v1, v1*v2, v1*v2*v3, ...
+    2. Invert the final product P once
+    3. Walk backwards, peeling one value off at a time
+    
+    Returns a list with the inverse of each value, or None for values
+    that have no inverse modulo m.
+    """
+    values = [value % m for value in values]
+    if not values:
+        return []
+
+    # Step 1: running products
+    prefix = []
+    running = 1
+    for value in values:
+        running = running * value % m
+        prefix.append(running)
+
+    # Step 2: invert the product once
+    inverse = mod_inverse(running, m)
+    if inverse is None:
+        # Some value shares a factor with m: fall back to one at a time
+        return [mod_inverse(value, m) for value in values]
+
+    # Step 3: inverse of prefix[i] times prefix[i-1] is the inverse of values[i]
+    result = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = inverse * prefix[i - 1] % m
+        inverse = inverse * values[i] % m
+    result[0] = inverse
+    return result
+
 # =============================================================================
 # VIGENÈRE CIPHER - TO BE IMPLEMENTED
 # =============================================================================
 
+class VigenereKey:
+    """
+    VIGENÈRE KEY
+    ============
+    
+    A keyword compiled once into its list of shifts (a=0, b=1, ..., z=25)
+    and the complementary shifts used to decrypt, so encrypting many texts
+    with the same keyword doesn't lowercase and re-index it every time.
+    """
+    __slots__ = ('keyword', 'shifts', 'decrypt_shifts')
+
+    def __init__(self, keyword):
+        self.keyword = keyword
+        self.shifts = _vigenere_shifts(keyword) # Raises ValueError if empty
+        # Subtracting a shift is the same as adding (26 - shift)
+        self.decrypt_shifts = [(26 - shift) % 26 for shift in self.shifts]
+
+    def encrypt(self, plain_text):
+        """
+        Shift every letter by the next keyword letter, keeping case.
+        """
+        return self._apply(plain_text, self.shifts)
+
+    def decrypt(self, cipher_text):
+        """
+        Shift every letter back by the next keyword letter.
+        """
+        return self._apply(cipher_text, self.decrypt_shifts)
+
+    @staticmethod
+    def _apply(text, shifts):
+        # Long texts go through the vectorized NumPy engine instead
+        # of the character-by-character loop
+        if _use_vigenere_numpy(text):
+            return _vigenere_numpy(text, shifts)
+        return _vigenere_python(text, shifts)
+
 def vigenere_encrypt(plain_text, keyword):
     """
     VIGENÈRE CIPHER ENCRYPTION - TO BE IMPLEMENTED
@@ -176,34 +303,7 @@ def vigenere_encrypt(plain_text, keyword):
     
     Result: "RIJVS"
     """
-    encrypted_text = "" # Initialize empty string for resul
-    keyword = keyword.lower() # Convert keyword to lowercase for consistency
-    keyword_index = 0 # Track position in keyword
-
-    for letter in plain_text:
-        # Only process alphabetic characters
-        if letter.isalpha():
-            # Calculate shift value from current keyword character
-            shift_val = ord(keyword[keyword_index % len(keyword)]) - ord('a')
-
-            # Handle uppercase letters
-            if letter.isupper():
-                shifted = (ord(letter) - 65 + shift_val) % 26 # A=65, mod 26
-                encrypted_letter = chr(shifted + 65)
-            # Handle lowercase letters
-            else:
-                shifted = (ord(letter) - 97 + shift_val) % 26 # a=97, mod 26
-                encrypted_letter = chr(shifted + 97)
-
-            keyword_index += 1 # Move to next keyword character
-        else:
-            # Keep non-alphabetic characters unchanged
-            encrypted_letter = letter
-        
-        # Append processed character to result
-        encrypted_text += encrypted_letter
-
-    return encrypted_text
+    return VigenereKey(keyword).encrypt(plain_text)
 
 def vigenere_decrypt(cipher_text, keyword):
     """
@@ -211,36 +311,229 @@ def vigenere_decrypt(cipher_text, keyword):
     ==============================================
     
     To decrypt, subtract the keyword letters instead of adding them.
+    
+    Don't know the keyword? vigenere_crack() (in the CRYPTANALYSIS
+    section) can usually recover it from a long enough ciphertext.
     """
-    decrypted_text = "" # Initialize empty string for result
-    keyword = keyword.lower() # Convert keyword to lowercase for consistency
-    keyword_index = 0 # Track position in keyword
+    return VigenereKey(keyword).decrypt(cipher_text)
 
-    for letter in cipher_text:
-        if letter.isalpha():
-            # Only process alphabetic characters
-            shift_val = ord(keyword[keyword_index % len(keyword)]) - ord('a')
-
-            # Calculate shift value from current keyword character
-            if letter.isupper():
-                # Reverse the shift (subtract instead of add) for decryption
-                shifted = (ord(letter) - 65 - shift_val) % 26 # A=65, mod 26
-                decrypted_letter = chr(shifted + 65)
-            # Handle lowercase letters
-            else:
-                shifted = (ord(letter) - 97 - shift_val) % 26 # a=97, mod 26
-                decrypted_letter = chr(shifted + 97)
 
-            keyword_index += 1 # Move to next keyword character
+# Texts shorter than this are faster in the plain Python loop than after
+# paying NumPy's fixed per-call overhead. Longer texts use the NumPy
+# engine whether or not they are pure ASCII.
+VIGENERE_NUMPY_THRESHOLD = 2048
+
+# Large texts are processed in blocks of this many characters so the
+# temporary arrays stay small no matter how big the input is.
+_VIGENERE_BLOCK_SIZE = 1 << 18
+
+# ASCII letters have their position in the alphabet in the low 5 bits
+# (A/a=1, ..., Z/z=26) and their case in the high 3 bits. After adding a
+# shift of 0-25 the low bits are in 1..51; this table wraps them back
+# into 1..26.
+_VIGENERE_WRAP = [0] + [(i - 1) % 26 + 1 for i in range(1, 52)]
+
+def _letter_base(character):
+    """
+    The base the character-by-character loop shifts a character from:
+    65 for uppercase letters, 97 for other letters, 0 for non-letters.
+    """
+    if not character.isalpha():
+        return 0
+    return 65 if character.isupper() else 97
+
+# _letter_base() of every ASCII character, for the code point version of
+# the NumPy engine
+if np is not None:
+    _ASCII_LETTER_BASES = np.array([_letter_base(chr(i)) for i in range(128)], dtype=np.int32)
+
+def _use_vigenere_numpy(text):
+    """
+    Decide whether a text should use the NumPy Vigenère engine.
+    """
+    return np is not None and len(text) >= VIGENERE_NUMPY_THRESHOLD
+
+def _vigenere_shifts(keyword):
+    """
+    Turn a keyword into its list of shifts (a=0, b=1, ..., z=25).
+    """
+    if not keyword:
+        raise ValueError("Keyword must not be empty.")
+    return [(ord(char) - ord('a')) % 26 for char in keyword.lower()]
+
+def _vigenere_numpy_block(block, out, shifts, wrap, offset):
+    """
+    Apply the Vigenère shifts to one uint8 block of ASCII text, writing
+    the shifted letters into out.
+
+    offset is the number of letters that came before this block, so the
+    keyword lines up exactly as in the character-by-character loop.
+    Returns the offset for the next block.
+    """
+    # Setting bit 0x20 lowercases A-Z, so this finds both cases at once.
+    # uint8 subtraction wraps around, so anything below 'a' becomes >= 160.
+    positions = np.flatnonzero(((block | 0x20) - 97) < 26)
+    letters = block[positions]
+
+    # Key stream for the letters only, starting at the right keyword letter
+    start = offset % len(shifts)
+    repeats = (len(letters) + start) // len(shifts) + 1
+    key_stream = np.tile(shifts, repeats)[start:start + len(letters)]
+
+    key_stream += letters & 0x1F
+    out[positions] = (letters & 0xE0) | wrap[key_stream]
+    return offset + len(letters)
+
+def _vigenere_numpy_unicode_block(block, out, shifts, offset):
+    """
+    The same as _vigenere_numpy_block(), for a block of uint32 code points.
+
+    Letters are whatever str.isalpha() accepts, shifted with the same
+    arithmetic as the character-by-character loop, so non-English letters
+    come out exactly as they do there. _letter_base() is called once per
+    distinct non-ASCII character in the block, not once per character.
+    """
+    bases = _ASCII_LETTER_BASES[np.minimum(block, 127)]
+    wide = np.flatnonzero(block > 127)
+    if len(wide):
+        codes, index = np.unique(block[wide], return_inverse=True)
+        bases[wide] = np.array([_letter_base(chr(code)) for code in codes.tolist()],
+                               dtype=np.int32)[index]
+
+    positions = np.flatnonzero(bases)
+    letters = block[positions].astype(np.int32)
+    base = bases[positions] # Preserve case
+
+    start = offset % len(shifts)
+    repeats = (len(letters) + start) // len(shifts) + 1
+    key_stream = np.tile(shifts, repeats)[start:start + len(letters)]
+
+    out[positions] = (letters - base + key_stream) % 26 + base
+    return offset + len(letters)
+
+def _vigenere_numpy(text, shifts, offset=0):
+    """
+    Vigenère engine for long texts: shift every letter with array
+    arithmetic instead of a Python loop. Decryption passes in the
+    complementary shifts.
+
+    ASCII text is worked on as bytes. Anything else is encoded as UTF-32,
+    which keeps exactly one code point per array element.
+    """
+    if not text.isascii():
+        data = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        out = data.copy()
+        shifts = np.array(shifts, dtype=np.int32)
+        for start in range(0, len(data), _VIGENERE_BLOCK_SIZE):
+            stop = start + _VIGENERE_BLOCK_SIZE
+            offset = _vigenere_numpy_unicode_block(data[start:stop], out[start:stop],
+                                                   shifts, offset)
+        return out.tobytes().decode('utf-32-le', 'surrogatepass')
+
+    data = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    shifts = np.array(shifts, dtype=np.uint8)
+    wrap = np.array(_VIGENERE_WRAP, dtype=np.uint8)
+    out = data.copy()
+
+    for start in range(0, len(data), _VIGENERE_BLOCK_SIZE):
+        stop = start + _VIGENERE_BLOCK_SIZE
+        offset = _vigenere_numpy_block(data[start:stop], out[start:stop],
+                                       shifts, wrap, offset)
+
+    return out.tobytes().decode('ascii')
+
+# Default number of characters each worker process handles at a time
+VIGENERE_PARALLEL_CHUNK_SIZE = 4 * 1024 * 1024
+
+def _vigenere_python(text, shifts, offset=0):
+    """
+    The character-by-character Vigenère loop, starting offset letters
+    into the keyword. Used for short texts, and when NumPy isn't installed.
+    """
+    result = []
+    for letter in text:
+        if letter.isalpha():
+            shift_val = shifts[offset % len(shifts)]
+            base = 65 if letter.isupper() else 97 # Preserve case
+            result.append(chr((ord(letter) - base + shift_val) % 26 + base))
+            offset += 1
         else:
-            # Preserve non-alphabetic characters as-i
-            decrypted_letter = letter
-        
-        # Append processed character to result
-        decrypted_text += decrypted_letter
+            result.append(letter)
+    return "".join(result)
+
+def _count_letters(text):
+    """
+    Count the characters that advance the keyword (the ones isalpha() accepts).
+    """
+    if text.isascii():
+        # str.count() is much faster than testing every character
+        return sum(text.count(letter) for letter in string.ascii_letters)
+    return sum(map(str.isalpha, text))
+
+def _vigenere_chunk(chunk, shifts, offset):
+    """
+    Worker function for the parallel Vigenère mode: shift one chunk,
+    starting offset letters into the keyword.
+    """
+    if np is not None:
+        return _vigenere_numpy(chunk, shifts, offset)
+    return _vigenere_python(chunk, shifts, offset)
+
+def _vigenere_parallel(text, shifts, workers, chunk_size):
+    """
+    Split text into chunks, work out where each chunk starts in the
+    keyword, and shift the chunks in a pool of worker processes.
+    """
+    chunk_size = chunk_size or VIGENERE_PARALLEL_CHUNK_SIZE
+    chunks = [text[start:start + chunk_size]
+              for start in range(0, len(text), chunk_size)]
+    if len(chunks) <= 1 or workers == 1:
+        return _vigenere_chunk(text, shifts, 0)
+
+    # Chunk i starts after all the letters in chunks 0..i-1
+    offsets = [0]
+    for chunk in chunks[:-1]:
+        offsets.append(offsets[-1] + _count_letters(chunk))
 
-    return decrypted_text
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_vigenere_chunk, chunks,
+                               [shifts] * len(chunks), offsets)
+        return "".join(results)
+
+def vigenere_encrypt_parallel(plain_text, keyword, workers=None, chunk_size=None):
+    """
+    PARALLEL VIGENÈRE ENCRYPTION
+    ============================
+    
+    Same result as vigenere_encrypt(), but the text is split into chunks
+    that are encrypted on several CPU cores at once.
+    
+    The tricky part is the keyword: in vigenere_encrypt() the keyword
+    position only moves forward on letters. So before handing out the
+    chunks we count the letters in every earlier chunk - that tells each
+    worker which keyword letter its chunk starts with.
+    
+    Parameters:
+    - plain_text (str): The text we want to encrypt
+    - keyword (str): The keyword
+    - workers (int): Number of processes (default: one per CPU core)
+    - chunk_size (int): Characters per chunk
+    
+    Returns:
+    - str: The encrypted text
+    """
+    return _vigenere_parallel(plain_text, VigenereKey(keyword).shifts,
+                              workers, chunk_size)
 
+def vigenere_decrypt_parallel(cipher_text, keyword, workers=None, chunk_size=None):
+    """
+    PARALLEL VIGENÈRE DECRYPTION
+    ============================
+    
+    The parallel counterpart of vigenere_decrypt().
+    """
+    return _vigenere_parallel(cipher_text, VigenereKey(keyword).decrypt_shifts,
+                              workers, chunk_size)
 
 # =============================================================================
 # AFFINE CIPHER - TO BE IMPLEMENTED
@@ -267,19 +560,10 @@ def affine_encrypt(plain_text, a, b):
     TODO: Implement this logic!
     Remember to check that gcd(a, 26) = 1!
     """
-    if gcd(a, 26) != 1:
-        raise ValueError( "'a' must be coprime with 26.")
-
-    result = ""
-    for char in plain_text:
-        if char.isalpha(): # Only encrypt letters
-            base = ord('A') if char.isupper() else ord('a') # Preserve case
-            x = ord(char) - base # Convert letter to 0-25
-            encrypted_char = (a * x + b) % 26 # Apply Affine formula
-            result += chr(encrypted_char + base) # Convert back to character
-        else:
-            result += char # Keep non-alphabet characters unchanged
-    return result
+    # The compiled key checks 'a' and builds its translation table once;
+    # after that every letter (upper and lower case) is remapped in one
+    # pass and non-alphabet characters stay unchanged
+    return _affine_key(a, b).encrypt(plain_text)
     
 
 def affine_decrypt(cipher_text, a, b):
@@ -294,51 +578,160 @@ def affine_decrypt(cipher_text, a, b):
     
     TODO: Implement this logic!
     """
-    if gcd(a, 26) != 1:
-        return ValueError("'a' must be coprime with 26.")
+    return _affine_key(a, b).decrypt(cipher_text)
 
-    a_inv = mod_inverse(a, 26) # Find modular inverse of a
-    if a_inv is None:
-        raise ValueError("Modular inverse does not exist.")
+# Every 'a' that has an inverse mod 26: 1, 3, 5, 7, 9, 11, 15, 17, 19, 21, 23, 25
+AFFINE_VALID_A = tuple(a for a in range(26) if gcd(a, 26) == 1)
 
-    result = ""
-    for char in cipher_text:
-        if char.isalpha(): # Only decrypt letters
-            base = ord('A') if char.isupper() else ord('a') # Preserve case
-            y = ord(char) - base # Convert letter to 0-25
-            decrypted_char = (a_inv * (y - b)) % 26 # Apply decryption formula
-            result += chr(decrypted_char + base) # Convert back to character
-        else:
-            result += char # Keep non-alphabet characters unchanged
-    return result
+class AffineKey:
+    """
+    AFFINE KEY
+    ==========
+    
+    An affine key (a, b) compiled once: 'a' is checked, its inverse mod 26
+    is found, and the case-preserving encrypt and decrypt translation
+    tables are built. After that each encrypt() or decrypt() is a single
+    str.translate() call with no gcd() or mod_inverse() work.
+    """
+    __slots__ = ('a', 'b', 'a_inverse', '_encrypt_table', '_decrypt_table')
+
+    def __init__(self, a, b):
+        if gcd(a, 26) != 1:
+            raise ValueError("'a' must be coprime with 26.")
+
+        a_inv = mod_inverse(a, 26) # Find modular inverse of a
+        if a_inv is None:
+            raise ValueError("Modular inverse does not exist.")
+
+        self.a, self.b, self.a_inverse = a % 26, b % 26, a_inv
+
+        # Position x in the alphabet maps to (a*x + b) mod 26, and
+        # position y maps back to a^(-1) * (y - b) mod 26
+        encrypted = "".join(ALPHABET[(a * x + b) % 26] for x in range(26))
+        decrypted = "".join(ALPHABET[a_inv * (y - b) % 26] for y in range(26))
+        lower = ALPHABET.lower()
+
+        self._encrypt_table = str.maketrans(ALPHABET + lower, encrypted + encrypted.lower())
+        self._decrypt_table = str.maketrans(ALPHABET + lower, decrypted + decrypted.lower())
+
+    def encrypt(self, plain_text):
+        """
+        Apply E(x) = (ax + b) mod 26 to every letter, keeping case.
+        """
+        return plain_text.translate(self._encrypt_table)
+
+    def decrypt(self, cipher_text):
+        """
+        Apply D(y) = a^(-1) * (y - b) mod 26 to every letter, keeping case.
+        """
+        return cipher_text.translate(self._decrypt_table)
+
+# Cache of compiled keys by (a mod 26, b mod 26). There are only 12 valid
+# 'a' values and 26 'b' values, so this never holds more than 312 keys.
+_AFFINE_KEY_CACHE = {}
+
+def _affine_key(a, b):
+    """
+    Return the compiled AffineKey for (a, b), building it the first time
+    the key is used. Raises ValueError if 'a' isn't coprime with 26.
+    """
+    key = _AFFINE_KEY_CACHE.get((a % 26, b % 26))
+    if key is None:
+        key = _AFFINE_KEY_CACHE[(a % 26, b % 26)] = AffineKey(a, b)
+    return key
 
 # =============================================================================
 # RSA CIPHER - TO BE IMPLEMENTED (ADVANCED)
 # =============================================================================
 
-def is_prime(n):
+# Random numbers for cryptographic use come from the operating system
+_random = random.SystemRandom()
+
+# Standard public exponent used for every key pair
+RSA_PUBLIC_EXPONENT = 65537
+
+def _sieve(limit):
+    """
+    Sieve of Eratosthenes: return every prime below limit.
+    """
+    is_candidate = bytearray([1]) * limit
+    is_candidate[0:2] = b"\x00\x00"
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if is_candidate[i]:
+            is_candidate[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i, flag in enumerate(is_candidate) if flag]
+
+# Small primes used to throw out most composite numbers with a cheap
+# division before running the (more expensive) Miller-Rabin test.
+SMALL_PRIMES = _sieve(2000)
+_SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+_SMALL_PRIME_PRODUCT = math.prod(SMALL_PRIMES)
+
+# Testing these bases is proven to give the right answer for every
+# n < 3,317,044,064,679,887,385,961,981 (which covers all 64-bit numbers).
+_DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+def _miller_rabin_round(n, d, r, base):
+    """
+    One Miller-Rabin round. n - 1 = d * 2^r with d odd.
+    Returns False if base proves that n is composite.
+    """
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(r - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+def is_prime(n, rounds=40):
     """
     PRIME NUMBER CHECKER - TO BE IMPLEMENTED
     =======================================
     
     RSA requires prime numbers. This function should check if a number is prime.
     
-    A simple algorithm:
+    Trying every divisor up to sqrt(n) takes far too long for big numbers
+    (a 20-digit prime needs billions of divisions), so we use the
+    Miller-Rabin test instead:
     1. If n < 2, it's not prime
-    2. Check if any number from 2 to sqrt(n) divides n evenly
-    3. If any divisor is found, n is not prime.
+    2. Divide by a table of small primes - this rejects most composites
+    3. Write n - 1 = d * 2^r and check pow(base, d, n) for several bases.
+       A prime always passes; a composite fails for most bases.
+    
+    For n below about 3.3 * 10^24 (all 64-bit numbers) a fixed set of
+    bases gives a guaranteed answer. Larger numbers are tested with
+    'rounds' random bases; the chance of a composite passing is below
+    4^(-rounds).
     
     """
     if n < 2:
       return False # 0 and 1 are not primes
 
-    for i in range(2, math.isqrt(n)+1):
-        if n%i==0:
-            return False # Found a divisor → not prime
+    if n in _SMALL_PRIME_SET:
+        return True
+    # One gcd with the product of all small primes replaces ~300 divisions
+    if math.gcd(n, _SMALL_PRIME_PRODUCT) != 1:
+        return False # Found a divisor → not prime
+    if n < SMALL_PRIMES[-1] ** 2:
+        return True # No divisor up to sqrt(n) → prime
+
+    # Write n - 1 as d * 2^r with d odd
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+
+    if n < _DETERMINISTIC_LIMIT:
+        bases = _DETERMINISTIC_BASES
+    else:
+        bases = [_random.randrange(2, n - 1) for _ in range(rounds)]
 
-    return True # No divisors found → prime
+    return all(_miller_rabin_round(n, d, r, base) for base in bases)
 
-def rsa_generate_keys(p, q):
+def rsa_generate_keys(p, q, extended=False):
     """
     RSA KEY GENERATION - TO BE IMPLEMENTED
     =====================================
@@ -354,15 +747,27 @@ def rsa_generate_keys(p, q):
     6. Calculate d = mod_inverse(e, φ(n))
     7. Public key = (e, n), Private key = (d, n)
     
+    With extended=True the private key also carries the values needed
+    for fast Chinese Remainder Theorem decryption (see rsa_decrypt):
+    Private key = (d, n, p, q, dp, dq, qinv) where
+    dp = d mod (p-1), dq = d mod (q-1) and qinv = q^(-1) mod p.
+    
     """
     if not (is_prime(p) and is_prime(q)):
         raise ValueError("p and q must be primes") # Validate primes
     if p == q:
         raise ValueError("p and q must be distinct") # Prevent weak keys
-        
+
+    return _rsa_keys_from_primes(p, q, extended)
+
+def _rsa_keys_from_primes(p, q, extended=False):
+    """
+    Build the RSA key pair from two primes that are already known to be
+    prime and distinct (steps 2-7 of rsa_generate_keys).
+    """
     n = p * q # RSA modulus
     phi = (p - 1) * (q - 1) # Euler's totient function
-    e = 65537 # Standard public exponent
+    e = RSA_PUBLIC_EXPONENT # Standard public exponent
     
     if gcd(e, phi) != 1:
         raise ValueError("e must be coprime with φ(n)") # Ensure inverse exists
@@ -374,9 +779,229 @@ def rsa_generate_keys(p, q):
     public_key = (e, n)
     private_key = (d, n)
 
+    if extended:
+        dp = d % (p - 1) # Exponent for the mod-p half
+        dq = d % (q - 1) # Exponent for the mod-q half
+        qinv = mod_inverse(q, p) # Used to recombine the two halves
+        private_key = (d, n, p, q, dp, dq, qinv)
+
     return public_key, private_key # Public and private keys
 
-def rsa_encrypt(message, public_key):
+# Primes used to sieve candidate windows. A longer list than SMALL_PRIMES
+# pays off here because each window is sieved once but holds thousands
+# of candidates.
+_WINDOW_SIEVE_PRIMES = _sieve(1 << 16)[1:] # Candidates are odd, so skip 2
+
+# Number of odd candidates sieved at once when searching for a random prime.
+# Around a 1024-bit number roughly 1 in 355 odd numbers is prime, so a
+# window this size almost always contains several.
+PRIME_SEARCH_WINDOW = 4096
+_SIEVE_ZEROS = memoryview(bytes(PRIME_SEARCH_WINDOW))
+
+def _miller_rabin_rounds(bits):
+    """
+    Miller-Rabin rounds needed for a random candidate of this size to be
+    wrong with probability below 2^-100 (FIPS 186-4, table C.2).
+    """
+    if bits >= 1536:
+        return 4
+    if bits >= 1024:
+        return 5
+    if bits >= 512:
+        return 7
+    return 40
+
+def _prime_in_window(bits):
+    """
+    Search one window of random odd numbers of the given size for a prime
+    suitable for RSA. Returns the prime, or None if the window had none.
+
+    Instead of testing candidates one by one, we first cross out every
+    candidate divisible by a small prime (a sieve over the window), so most
+    composites are rejected without any modular exponentiation.
+    """
+    # Top two bits set so that p * q has exactly 2 * bits bits
+    start = _random.getrandbits(bits) | (3 << (bits - 2)) | 1
+
+    # sieve[i] stays 1 while start + 2*i might still be prime
+    sieve = bytearray([1]) * PRIME_SEARCH_WINDOW
+    for prime in _WINDOW_SIEVE_PRIMES:
+        if prime >= start:
+            break # Small keys: don't cross out the primes themselves
+        # First i with (start + 2*i) % prime == 0; (prime + 1) // 2 is 1/2 mod prime
+        first = (-(start % prime) * ((prime + 1) // 2)) % prime
+        if first < PRIME_SEARCH_WINDOW:
+            count = (PRIME_SEARCH_WINDOW - 1 - first) // prime + 1
+            sieve[first::prime] = _SIEVE_ZEROS[:count]
+
+    rounds = _miller_rabin_rounds(bits)
+    i = sieve.find(1)
+    while i != -1:
+        candidate = start + 2 * i
+        if candidate.bit_length() != bits:
+            break
+        # p - 1 must be coprime with e, or there is no private exponent
+        if candidate % RSA_PUBLIC_EXPONENT != 1 and is_prime(candidate, rounds):
+            return candidate
+        i = sieve.find(1, i + 1)
+    return None
+
+def generate_primes(bits, count=1, workers=None):
+    """
+    RANDOM PRIME GENERATION
+    =======================
+    
+    Generate 'count' distinct random primes with exactly 'bits' bits.
+    
+    Each attempt sieves a window of candidates and runs Miller-Rabin on
+    the survivors (see _prime_in_window). With workers > 1 the windows
+    are searched in parallel on several CPU cores.
+    
+    Parameters:
+    - bits (int): Size of each prime in bits (at least 16)
+    - count (int): How many primes to return
+    - workers (int): Number of processes (default: one per CPU core)
+    
+    Returns:
+    - list: The primes
+    """
+    if bits < 16:
+        raise ValueError("Primes must be at least 16 bits")
+    workers = workers or os.cpu_count() or 1
+
+    primes = []
+    if workers == 1:
+        while len(primes) < count:
+            prime = _prime_in_window(bits)
+            if prime is not None and prime not in primes:
+                primes.append(prime)
+        return primes
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while len(primes) < count:
+            batch = max(workers, count - len(primes))
+            for prime in executor.map(_prime_in_window, [bits] * batch):
+                if prime is not None and prime not in primes:
+                    primes.append(prime)
+    return primes[:count]
+
+def generate_prime(bits, workers=None):
+    """
+    Generate a single random prime with exactly 'bits' bits.
+    """
+    return generate_primes(bits, 1, workers)[0]
+
+def rsa_generate_random_keys(bits=2048, extended=False, workers=None):
+    """
+    SIZED RSA KEY GENERATION
+    ========================
+    
+    Like rsa_generate_keys(), but picks the primes itself: p and q are
+    random primes of half the key size each, so n has exactly 'bits' bits
+    (e.g. 1024, 2048 or 3072).
+    
+    Returns:
+    - tuple: (public_key, private_key), as from rsa_generate_keys()
+    """
+    if bits < 32:
+        raise ValueError("Key size must be at least 32 bits")
+
+    if bits % 2 == 0:
+        p, q = generate_primes(bits // 2, 2, workers)
+    else:
+        p = generate_prime(bits // 2 + 1, workers)
+        q = generate_prime(bits // 2, workers)
+    return _rsa_keys_from_primes(p, q, extended)
+
+class RSAKey:
+    """
+    RSA KEY
+    =======
+    
+    One half of an RSA key pair - (e, n) or (d, n) - unpacked and checked
+    once. Given the primes p and q as well, it also precomputes the Chinese
+    Remainder Theorem values dp, dq and qinv (see rsa_decrypt), so every
+    decryption after that uses the fast CRT path.
+    
+    rsa_encrypt() and rsa_decrypt() accept one of these wherever they
+    accept a key tuple; from_tuple() converts the tuples they return.
+    """
+    __slots__ = ('exponent', 'n', 'p', 'q', 'dp', 'dq', 'qinv')
+
+    def __init__(self, exponent, n, p=None, q=None, dp=None, dq=None, qinv=None):
+        if n < 2 or exponent < 1:
+            raise ValueError("Invalid RSA key")
+        self.exponent, self.n = exponent, n
+        self.p = self.q = self.dp = self.dq = self.qinv = None
+        if p is not None and q is not None:
+            if p * q != n:
+                raise ValueError("p * q must equal n")
+            self.p, self.q = p, q
+            self.dp = exponent % (p - 1) if dp is None else dp # Exponent for the mod-p half
+            self.dq = exponent % (q - 1) if dq is None else dq # Exponent for the mod-q half
+            self.qinv = mod_inverse(q, p) if qinv is None else qinv # Recombines the halves
+
+    @classmethod
+    def from_tuple(cls, key):
+        """
+        Build a key from (e, n), (d, n) or the extended private key
+        (d, n, p, q, dp, dq, qinv). An RSAKey is returned unchanged.
+        """
+        if isinstance(key, cls):
+            return key
+        return cls(*key)
+
+    def as_tuple(self):
+        """
+        The key as the tuple rsa_generate_keys() would return.
+        """
+        if self.p is None:
+            return (self.exponent, self.n)
+        return (self.exponent, self.n, self.p, self.q, self.dp, self.dq, self.qinv)
+
+    def power(self, value):
+        """
+        Compute value^exponent mod n, using the CRT values when the key
+        has them.
+        """
+        if self.p is None:
+            return pow(value, self.exponent, self.n) # Modular exponentiation
+
+        m_p = pow(value, self.dp, self.p) # m mod p
+        m_q = pow(value, self.dq, self.q) # m mod q
+        h = self.qinv * (m_p - m_q) % self.p # Garner's recombination
+        return m_q + h * self.q
+
+    def encrypt(self, message, block_mode=False, workers=1):
+        """
+        Encrypt with this (public) key; see rsa_encrypt().
+        """
+        if block_mode:
+            return _rsa_encrypt_blocks(message, self, workers)
+
+        if isinstance(message, str):
+            message = int.from_bytes(message.encode(), 'big') # String → int
+
+        if message >= self.n:
+            raise ValueError("Message too large for key size") # Prevent overflow
+
+        return self.power(message)
+
+    def decrypt(self, ciphertext):
+        """
+        Decrypt with this (private) key; see rsa_decrypt().
+        """
+        if isinstance(ciphertext, str):
+            return _rsa_decrypt_blocks(ciphertext, self)
+
+        m = self.power(ciphertext)
+        try:
+            # Convert integer to bytes, then to string
+            return m.to_bytes((m.bit_length() + 7) // 8, 'big').decode()
+        except:
+            return m # Return integer if decoding fails (e.g., non-text data)
+
+def rsa_encrypt(message, public_key, block_mode=False, workers=1):
     """
     RSA ENCRYPTION - TO BE IMPLEMENTED
     =================================
@@ -389,17 +1014,14 @@ def rsa_encrypt(message, public_key):
         2. Check if message is too large for n.
         3. Compute c = mᵉ mod n.
     
-    """
-    e, n = public_key
-    
-    if isinstance(message, str):
-        message = int.from_bytes(message.encode(), 'big') # String → int
-    
-    if message >= n:
-        raise ValueError("Message too large for key size") # Prevent overflow
+    With block_mode=True, messages longer than the modulus are allowed:
+    the UTF-8 bytes are split into blocks that each fit below n, every
+    block is encrypted on its own, and the result is a compact string
+    (see _rsa_encrypt_blocks). With workers > 1 the blocks are encrypted
+    in parallel.
     
-    c = pow(message, e, n) # Modular exponentiation
-    return c
+    """
+    return RSAKey.from_tuple(public_key).encrypt(message, block_mode, workers)
 
 def rsa_decrypt(ciphertext, private_key):
     """
@@ -409,41 +1031,1623 @@ def rsa_decrypt(ciphertext, private_key):
     Decrypts a message using the private key.
     Formula: m = c^d mod n
     
+    If the private key is the extended form from
+    rsa_generate_keys(p, q, extended=True), we use the Chinese Remainder
+    Theorem instead: compute m mod p and m mod q with exponents half the
+    size of d, then combine them. This is about 3-4x faster for large n
+    and gives exactly the same m.
+    
+    A string ciphertext is treated as the output of block mode and is
+    decrypted one block at a time.
+    
+    """
+    return RSAKey.from_tuple(private_key).decrypt(ciphertext)
+
+# Block-mode messages with fewer blocks than this are encrypted in the
+# current process; starting worker processes isn't worth it below that.
+RSA_PARALLEL_MIN_BLOCKS = 64
+
+def _rsa_block_sizes(n):
+    """
+    Return (plain_size, cipher_size) in bytes for block mode.
+    Plaintext blocks are one byte shorter than n so they are always < n;
+    ciphertext blocks are stored at the full width of n.
+    """
+    plain_size = (n.bit_length() - 1) // 8
+    if plain_size < 1:
+        raise ValueError("Key too small for block mode (n must be at least 256)")
+    return plain_size, (n.bit_length() + 7) // 8
+
+def _rsa_encrypt_blocks(message, key, workers=1):
+    """
+    Encrypt a message of any length block by block with an RSAKey.
+
+    The result is "<length>:<base64>", where length is the number of
+    plaintext bytes and the base64 data is every ciphertext block written
+    out at the full width of n, one after the other.
+    """
+    e, n = key.exponent, key.n
+    data = message.encode() if isinstance(message, str) else bytes(message)
+    plain_size, cipher_size = _rsa_block_sizes(n)
+
+    blocks = [int.from_bytes(data[i:i + plain_size], 'big')
+              for i in range(0, len(data), plain_size)]
+
+    if workers != 1 and len(blocks) >= RSA_PARALLEL_MIN_BLOCKS:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(blocks) // (workers * 4))
+            encrypted = list(executor.map(pow, blocks, repeat(e), repeat(n),
+                                          chunksize=chunksize))
+    else:
+        encrypted = [pow(block, e, n) for block in blocks]
+
+    payload = b"".join(c.to_bytes(cipher_size, 'big') for c in encrypted)
+    return f"{len(data)}:{base64.b64encode(payload).decode('ascii')}"
+
+def _rsa_iter_plain_blocks(ciphertext, key):
+    """
+    Yield the plaintext bytes of a block-mode ciphertext one block at a
+    time, decrypting with an RSAKey.
+
+    The base64 payload is decoded a few blocks at a time instead of all
+    at once, so memory use doesn't depend on the message length.
     """
-    d, n = private_key
-    m = pow(ciphertext, d, n)  # Modular exponentiation
+    plain_size, cipher_size = _rsa_block_sizes(key.n)
     try:
-        # Convert integer to bytes, then to string
-        return m.to_bytes((m.bit_length() + 7) // 8, 'big').decode()
-    except:
-        return m # Return integer if decoding fails (e.g., non-text data)
+        length, payload = ciphertext.strip().split(":", 1)
+        remaining = int(length)
+    except ValueError:
+        raise ValueError("Malformed block-mode ciphertext")
 
-# =============================================================================
-# TESTING FUNCTIONS
-# =============================================================================
+    # 4 base64 characters hold 3 bytes, so 4 * cipher_size characters
+    # always decode to exactly 3 whole ciphertext blocks.
+    step = 4 * cipher_size
+    for start in range(0, len(payload), step):
+        try:
+            group = base64.b64decode(payload[start:start + step], validate=True)
+        except ValueError: # binascii.Error
+            raise ValueError("Malformed block-mode ciphertext")
+        for offset in range(0, len(group), cipher_size):
+            block = group[offset:offset + cipher_size]
+            if remaining <= 0 or len(block) != cipher_size:
+                raise ValueError("Malformed block-mode ciphertext")
+            c = int.from_bytes(block, 'big')
+            size = min(plain_size, remaining)
+            try:
+                yield key.power(c).to_bytes(size, 'big')
+            except OverflowError:
+                raise ValueError("Block does not decrypt with this key")
+            remaining -= size
 
-def test_caesar_cipher():
+    if remaining:
+        raise ValueError("Malformed block-mode ciphertext")
+
+def _rsa_decrypt_blocks(ciphertext, key):
     """
-    Test function for the Caesar cipher to make sure it works correctly.
-    You can run this to verify your implementation!
+    Decrypt the output of _rsa_encrypt_blocks. Every block is decrypted
+    once and the bytes are decoded together at the end (a character may
+    be split across two blocks). Returns bytes instead of str if the
+    plaintext isn't valid UTF-8.
     """
-    print("Testing Caesar Cipher...")
-    
-    # Test case 1: Basic encryption
-    plain = "HELLO WORLD"
-    shift = 3
-    encrypted = caesar_encrypt(plain, shift)
-    decrypted = caesar_decrypt(encrypted, shift)
+    data = b"".join(_rsa_iter_plain_blocks(ciphertext, key))
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data
+
+class RSAKeyCache:
+    """
+    RSA KEY PAIR CACHE
+    ==================
     
-    print(f"Original: {plain}")
-    print(f"Encrypted (shift {shift}): {encrypted}")
-    print(f"Decrypted: {decrypted}")
-    print(f"Test passed: {plain == decrypted}")
-    print()
+    Remembers the key pairs made by rsa_generate_keys(), so asking again
+    for the same p and q (say the textbook 61 and 53) returns the stored
+    keys instead of re-checking the primes and re-computing d.
     
-    # Test case 2: Wrap-around
-    plain = "XYZ"
-    shift = 5
+    It is an LRU ("least recently used") cache: when it is full, the key
+    pair that was asked for longest ago is thrown away. It is full when it
+    holds max_entries pairs or when the numbers in it take up more than
+    max_bytes of memory, whichever comes first.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict() # (p, q, extended) -> (keys, size)
+        self._lock = threading.Lock() # Flask may serve requests in threads
+
+    def get_keys(self, p, q, extended=False):
+        """
+        Return rsa_generate_keys(p, q, extended), from the cache if possible.
+        """
+        cache_key = (p, q, extended)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key) # Now the most recent
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Generate outside the lock so other requests aren't held up.
+        # Invalid p and q raise ValueError here and are not cached.
+        keys = rsa_generate_keys(p, q, extended)
+        size = sum(sys.getsizeof(value) for key in keys for value in key)
+
+        with self._lock:
+            if size > self.max_bytes or cache_key in self._entries:
+                return keys
+            self._entries[cache_key] = (keys, size)
+            self.size_bytes += size
+            # Evict the least recently used pairs until we fit again
+            while (len(self._entries) > self.max_entries
+                   or self.size_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+        return keys
+
+    def stats(self):
+        """
+        Return the hit/miss counters and current size as a dict.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+            }
+
+    def clear(self):
+        """
+        Empty the cache and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = self.hits = self.misses = 0
+
+# Shared cache used by rsa_generate_keys_cached() and the /rsa page
+rsa_key_cache = RSAKeyCache()
+
+def rsa_generate_keys_cached(p, q, extended=False):
+    """
+    Same as rsa_generate_keys(), but served from rsa_key_cache when the
+    same p and q were used before.
+    """
+    return rsa_key_cache.get_keys(p, q, extended)
+
+class RSAKeyring:
+    """
+    RSA KEYRING
+    ===========
+    
+    Keeps key pairs on the server under a random, opaque key ID, so a web
+    page or script can say "use key Xq3..." instead of sending n, e and d
+    back as decimal strings on every request, and the private key never
+    has to leave the server. (Parsing a posted key costs little next to
+    the decryption itself - see benchmark_rsa_keyring.)
+    
+    Each pair is stored as two ready-to-use RSAKey objects; give add() an
+    extended private key and decryption uses the CRT values it carries.
+    
+    A key expires ttl seconds after it was last used. It is also thrown
+    away, least recently used first, once the ring holds max_entries keys.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._keys = OrderedDict() # key_id -> ((public, private), last used)
+        self._lock = threading.Lock()
+
+    def add(self, public_key, private_key):
+        """
+        Store a key pair (tuples or RSAKey objects) and return its new ID.
+        """
+        pair = (RSAKey.from_tuple(public_key), RSAKey.from_tuple(private_key))
+        key_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            self._keys[key_id] = (pair, now)
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+        return key_id
+
+    def get(self, key_id):
+        """
+        Return (public RSAKey, private RSAKey) for key_id, or None if the
+        ID is unknown or has expired. Using a key keeps it for another
+        ttl seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._keys.get(key_id)
+            if entry is None:
+                return None
+            self._keys[key_id] = (entry[0], now)
+            self._keys.move_to_end(key_id) # Now the most recently used
+            return entry[0]
+
+    def remove(self, key_id):
+        """
+        Forget a key pair. Unknown IDs are ignored.
+        """
+        with self._lock:
+            self._keys.pop(key_id, None)
+
+    def __len__(self):
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return len(self._keys)
+
+    def _evict_expired(self, now):
+        # Entries are kept in order of last use, so every expired entry
+        # is at the front; stop at the first one that is still fresh
+        while self._keys:
+            key_id, (_, last_used) = next(iter(self._keys.items()))
+            if now - last_used < self.ttl:
+                break
+            del self._keys[key_id]
+
+# Shared keyring used by the /rsa page and the JSON API
+rsa_keyring = RSAKeyring()
+
+# Size of the random session key used by the hybrid mode
+HYBRID_SESSION_KEY_SIZE = 32
+
+# The hybrid keystream is produced and applied in chunks of this many bytes
+_HYBRID_CHUNK_SIZE = 1 << 20
+
+def _hybrid_keystream(session_key, index, size):
+    """
+    Return 'size' bytes of keystream for chunk number 'index'.
+
+    Each chunk's keystream is SHAKE-256 of the session key and the chunk
+    number, so it looks random, never repeats like a short Vigenère
+    keyword would, and any chunk can be produced on its own.
+    """
+    seed = session_key + index.to_bytes(8, 'big')
+    return hashlib.shake_256(seed).digest(size)
+
+def _vigenere_bytes(data, keystream, decrypt=False):
+    """
+    Vigenère over bytes: add (or subtract) each keystream byte to the
+    matching data byte, mod 256 instead of mod 26.
+    """
+    if np is not None:
+        data = np.frombuffer(data, dtype=np.uint8)
+        keystream = np.frombuffer(keystream, dtype=np.uint8)
+        # uint8 arithmetic wraps around, which is exactly "mod 256"
+        return (data - keystream if decrypt else data + keystream).tobytes()
+    if decrypt:
+        return bytes((x - k) & 0xFF for x, k in zip(data, keystream))
+    return bytes((x + k) & 0xFF for x, k in zip(data, keystream))
+
+def _hybrid_apply(data, session_key, decrypt=False):
+    """
+    Run the byte-Vigenère pass over the whole payload, chunk by chunk.
+    """
+    view = memoryview(data)
+    out = bytearray()
+    for index, start in enumerate(range(0, len(view), _HYBRID_CHUNK_SIZE)):
+        chunk = view[start:start + _HYBRID_CHUNK_SIZE]
+        keystream = _hybrid_keystream(session_key, index, len(chunk))
+        out += _vigenere_bytes(chunk, keystream, decrypt)
+    return bytes(out)
+
+def _hybrid_tag(session_key, payload):
+    """
+    HMAC-SHA256 over the encrypted payload, so a wrong key or a damaged
+    envelope is detected instead of decrypting to garbage.
+    """
+    mac_key = hashlib.sha256(b"mac" + session_key).digest()
+    return hmac.new(mac_key, payload, hashlib.sha256).digest()
+
+def rsa_hybrid_encrypt(message, public_key):
+    """
+    HYBRID RSA ENCRYPTION
+    =====================
+    
+    RSA is slow - every block costs a modular exponentiation. Real systems
+    therefore use RSA only for a short random "session key", and encrypt
+    the message itself with a fast symmetric cipher.
+    
+    Algorithm:
+    1. Pick a random 32-byte session key
+    2. Encrypt the session key with RSA (block mode)
+    3. Encrypt the message with a Vigenère cipher over bytes, using a
+       keystream generated from the session key (as long as the message)
+    4. Add an HMAC tag so tampering is detected
+    
+    Returns:
+    - str: "<wrapped key>.<base64 payload>.<base64 tag>"
+    """
+    data = message.encode() if isinstance(message, str) else bytes(message)
+    session_key = os.urandom(HYBRID_SESSION_KEY_SIZE)
+
+    wrapped_key = rsa_encrypt(session_key, public_key, block_mode=True)
+    payload = _hybrid_apply(data, session_key)
+    tag = _hybrid_tag(session_key, payload)
+
+    return ".".join([wrapped_key,
+                     base64.b64encode(payload).decode('ascii'),
+                     base64.b64encode(tag).decode('ascii')])
+
+def rsa_hybrid_decrypt(envelope, private_key):
+    """
+    HYBRID RSA DECRYPTION
+    =====================
+    
+    Unwrap the session key with rsa_decrypt(), check the HMAC tag and run
+    the byte-Vigenère pass backwards. Returns bytes instead of str if the
+    message isn't valid UTF-8.
+    """
+    try:
+        wrapped_key, payload, tag = envelope.strip().split(".")
+        payload = base64.b64decode(payload, validate=True)
+        tag = base64.b64decode(tag, validate=True)
+    except ValueError:
+        raise ValueError("Malformed hybrid envelope")
+
+    session_key = b"".join(_rsa_iter_plain_blocks(wrapped_key, RSAKey.from_tuple(private_key)))
+    if not hmac.compare_digest(tag, _hybrid_tag(session_key, payload)):
+        raise ValueError("Envelope does not decrypt with this key")
+
+    data = _hybrid_apply(payload, session_key, decrypt=True)
+    try:
+        return data.decode()
+    except UnicodeDecodeError:
+        return data
+
+# =============================================================================
+# BATCH PROCESSING
+# =============================================================================
+
+CIPHERS = ('caesar', 'vigenere', 'affine', 'rsa')
+
+def cipher_batch(cipher, op, key, texts):
+    """
+    BATCH ENCRYPTION / DECRYPTION
+    =============================
+    
+    Encrypt or decrypt many texts that all use the same cipher and key.
+    The key is compiled once (a CaesarKey, VigenereKey, AffineKey or
+    RSAKey) and then applied to every text, instead of redoing that work
+    on every call.
+    
+    Parameters:
+    - cipher (str): 'caesar', 'vigenere', 'affine' or 'rsa'
+    - op (str): 'encrypt' or 'decrypt'
+    - key: shift (caesar), keyword (vigenere), (a, b) (affine),
+      (e, n) or (d, n) (rsa)
+    - texts (list): The texts to process
+    
+    Returns:
+    - list: One result per text, in the same order
+    """
+    if op not in ('encrypt', 'decrypt'):
+        raise ValueError("op must be 'encrypt' or 'decrypt'")
+    encrypt = op == 'encrypt'
+
+    if cipher == 'caesar':
+        compiled = _CAESAR_KEYS[key % 26]
+    elif cipher == 'affine':
+        compiled = _affine_key(*key)
+    elif cipher == 'vigenere':
+        compiled = VigenereKey(key)
+    elif cipher == 'rsa':
+        compiled = RSAKey.from_tuple(key)
+        if encrypt:
+            # Texts that don't fit below n are encrypted block by block
+            n = compiled.n
+            return [compiled.encrypt(text, block_mode=int.from_bytes(text.encode(), 'big') >= n)
+                    for text in texts]
+    else:
+        raise ValueError(f"Unknown cipher '{cipher}'")
+
+    apply = compiled.encrypt if encrypt else compiled.decrypt
+    return [apply(text) for text in texts]
+
+# Per-key translation tables for the row functions below, stacked into one
+# array per cipher: row k of the Caesar table is the bytes.translate()
+# table for shift k, row a * 26 + b of each affine table is the table for
+# the key (a, b). Built the first time they are needed.
+_ROW_TABLES = {}
+
+def _row_tables(cipher):
+    """
+    Return the stacked per-key byte tables for 'caesar' (26 x 256) or
+    'affine' (2 x 676 x 256: encrypt, decrypt). Without NumPy these are
+    lists of bytes tables instead.
+    """
+    tables = _ROW_TABLES.get(cipher)
+    if tables is not None:
+        return tables
+
+    if cipher == 'caesar':
+        tables = [_caesar_byte_table(shift) for shift in range(26)]
+    else:
+        identity = bytes(range(256)) # Rows for invalid 'a' are never used
+        tables = [[identity] * 676 for _ in range(2)]
+        for a in AFFINE_VALID_A:
+            for b in range(26):
+                tables[0][a * 26 + b], tables[1][a * 26 + b] = _affine_byte_tables(a, b)
+    if np is not None and cipher == 'caesar':
+        tables = np.frombuffer(b"".join(tables), dtype=np.uint8).reshape(26, 256)
+    elif np is not None:
+        tables = np.frombuffer(b"".join(b"".join(half) for half in tables),
+                               dtype=np.uint8).reshape(2, 676, 256)
+    _ROW_TABLES[cipher] = tables
+    return tables
+
+def _per_row(value, count):
+    """
+    Turn a key that is either one int (the same for every row) or one int
+    per row into a list of count ints.
+    """
+    if isinstance(value, int):
+        return [value] * count
+    value = [int(v) for v in value]
+    if len(value) != count:
+        raise ValueError("Need one key per row")
+    return value
+
+def pack_rows(records):
+    """
+    PACKING RECORDS INTO ROWS
+    =========================
+    
+    Calling caesar_encrypt() a million times for a million short records
+    spends most of its time in Python function calls, not in the cipher.
+    Instead, pack every record into one row of a 2-D uint8 array (padded
+    with zero bytes to the length of the longest) so a single NumPy
+    operation can process the whole batch, then unpack_rows() the result.
+    
+    Parameters:
+    - records (list): str (stored as UTF-8) or bytes records
+    
+    Returns:
+    - (rows, lengths): a (len(records), longest) uint8 array and the
+      length in bytes of each record. Without NumPy, rows is a plain
+      list of bytes instead.
+    """
+    if np is None:
+        records = [record.encode('utf-8') if isinstance(record, str) else bytes(record)
+                   for record in records]
+        return records, [len(record) for record in records]
+
+    joined = "".join(records) if all(isinstance(record, str) for record in records) else None
+    if joined is not None and joined.isascii():
+        # Plain ASCII text: one encode for the lot, and lengths don't change
+        data, lengths = joined.encode('ascii'), [len(record) for record in records]
+    else:
+        records = [record.encode('utf-8') if isinstance(record, str) else bytes(record)
+                   for record in records]
+        data, lengths = b"".join(records), [len(record) for record in records]
+
+    lengths = np.array(lengths, dtype=np.intp)
+    width = int(lengths.max()) if len(lengths) else 0
+    rows = np.zeros((len(lengths), width), dtype=np.uint8)
+    # Row-major order, so the True cells are filled in record order
+    rows[np.arange(width) < lengths[:, None]] = np.frombuffer(data, dtype=np.uint8)
+    return rows, lengths
+
+def unpack_rows(rows, lengths, as_text=True):
+    """
+    Undo pack_rows(): cut each row back to its record's length.
+    
+    Returns:
+    - list: str records (decoded as UTF-8) if as_text, bytes otherwise
+    """
+    if np is None:
+        records = [bytes(row[:length]) for row, length in zip(rows, lengths)]
+    else:
+        lengths = np.asarray(lengths, dtype=np.intp)
+        data = rows[np.arange(rows.shape[1]) < lengths[:, None]].tobytes()
+        if as_text and data.isascii(): # Decode once and slice the str instead
+            data, as_text = data.decode('ascii'), False
+        ends = np.cumsum(lengths).tolist()
+        records = [data[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    return [record.decode('utf-8') for record in records] if as_text else records
+
+def _gather_rows(tables, keys, rows):
+    """
+    Look every byte of every row up in its own row's table: the key index
+    (one per row, or one for all) is broadcast across the row's bytes.
+    """
+    keys = np.asarray(keys, dtype=np.intp)
+    if keys.ndim == 1:
+        if len(keys) != len(rows):
+            raise ValueError("Need one key per row")
+        keys = keys[:, None]
+    return tables.reshape(-1).take(keys * 256 + rows)
+
+def caesar_rows(rows, shifts, decrypt=False):
+    """
+    Caesar-shift packed rows (see pack_rows()), each row with its own
+    shift. Works like caesar_encrypt_bytes(): ASCII letters are shifted
+    and uppercased, every other byte (including the padding) is kept.
+    
+    Parameters:
+    - rows: packed rows from pack_rows()
+    - shifts: one shift for every row, or a sequence/array of one per row
+    - decrypt (bool): Shift backwards instead
+    
+    Returns:
+    - New rows of the same shape
+    """
+    tables = _row_tables('caesar')
+    sign = -1 if decrypt else 1
+    if np is None:
+        return [row.translate(tables[sign * shift % 26])
+                for row, shift in zip(rows, _per_row(shifts, len(rows)))]
+    return _gather_rows(tables, sign * np.asarray(shifts) % 26, rows)
+
+def affine_rows(rows, a, b, decrypt=False):
+    """
+    Affine-encrypt (or decrypt) packed rows (see pack_rows()), each row
+    with its own key. Works like affine_encrypt_bytes(): case is kept and
+    only ASCII letters change.
+    
+    Parameters:
+    - rows: packed rows from pack_rows()
+    - a, b: one value for every row, or a sequence/array of one per row;
+      every 'a' must be coprime with 26
+    - decrypt (bool): Decrypt instead of encrypting
+    
+    Returns:
+    - New rows of the same shape
+    """
+    tables = _row_tables('affine')[1 if decrypt else 0]
+    if np is None:
+        keys = [(a_row % 26) * 26 + b_row % 26
+                for a_row, b_row in zip(_per_row(a, len(rows)), _per_row(b, len(rows)))]
+        if any(gcd(key // 26, 26) != 1 for key in keys):
+            raise ValueError("'a' must be coprime with 26.")
+        return [row.translate(tables[key]) for row, key in zip(rows, keys)]
+
+    a, b = np.asarray(a) % 26, np.asarray(b) % 26
+    if (np.gcd(a, 26) != 1).any():
+        raise ValueError("'a' must be coprime with 26.")
+    return _gather_rows(tables, a * 26 + b, rows)
+
+def cipher_batch_keyed(cipher, op, keys, texts):
+    """
+    BATCH ENCRYPTION WITH ONE KEY PER TEXT
+    ======================================
+    
+    Like cipher_batch(), but every text has its own key. The texts are
+    packed into one 2-D array, every row is processed at once with its
+    own key, and the rows are unpacked again - so the per-call Python
+    overhead is paid once for the batch instead of once per text.
+    
+    As with the *_bytes() functions, only ASCII letters are changed.
+    
+    Parameters:
+    - cipher (str): 'caesar' or 'affine'
+    - op (str): 'encrypt' or 'decrypt'
+    - keys (list): One shift (caesar) or (a, b) pair (affine) per text
+    - texts (list): The texts to process
+    
+    Returns:
+    - list: One result per text, in the same order
+    """
+    if op not in ('encrypt', 'decrypt'):
+        raise ValueError("op must be 'encrypt' or 'decrypt'")
+    if len(keys) != len(texts):
+        raise ValueError("Need one key per text")
+    if not texts:
+        return []
+
+    rows, lengths = pack_rows(texts)
+    if cipher == 'caesar':
+        rows = caesar_rows(rows, keys, decrypt=op == 'decrypt')
+    elif cipher == 'affine':
+        rows = affine_rows(rows, [a for a, _ in keys], [b for _, b in keys],
+                           decrypt=op == 'decrypt')
+    else:
+        raise ValueError(f"Cipher '{cipher}' has no per-text key batch version")
+    return unpack_rows(rows, lengths)
+
+
+# =============================================================================
+# BYTES
+# =============================================================================
+
+# The byte-level functions below work directly on bytes, bytearray,
+# memoryview, mmap or any other object that supports the buffer protocol,
+# so callers never need to decode and re-encode. Only ASCII letters are
+# changed; every other byte passes through untouched.
+
+def _caesar_byte_table(shift_key):
+    """
+    256-entry bytes.translate() table for a Caesar shift. Lowercase
+    letters map straight to shifted uppercase, which folds case and
+    shifts in a single pass like caesar_encrypt() does.
+    """
+    shift = shift_key % 26
+    shifted = (ALPHABET[shift:] + ALPHABET[:shift]).encode('ascii')
+    return bytes.maketrans(ALPHABET.encode('ascii') + ALPHABET.lower().encode('ascii'),
+                           shifted + shifted)
+
+def _affine_byte_tables(a, b):
+    """
+    Case-preserving bytes.translate() tables (encrypt, decrypt) for the
+    affine key (a, b), built from the cached compiled key.
+    """
+    key = _affine_key(a, b)
+    letters = (ALPHABET + ALPHABET.lower()).encode('ascii')
+    return tuple(bytes.maketrans(letters, text.encode('ascii'))
+                 for text in (key.encrypt(letters.decode('ascii')),
+                              key.decrypt(letters.decode('ascii'))))
+
+def _vigenere_letters_into(data, out, shifts, offset):
+    """
+    Vigenère-shift the ASCII letters of data into out, starting offset
+    letters into the keyword. out may be data itself. Returns the new
+    offset.
+    """
+    if np is not None:
+        block = np.frombuffer(data, dtype=np.uint8)
+        target = np.frombuffer(out, dtype=np.uint8, count=len(block))
+        if not np.shares_memory(block, target):
+            target[:] = block # Everything that isn't a letter is copied as is
+        shifts = np.array(shifts, dtype=np.uint8)
+        wrap = np.array(_VIGENERE_WRAP, dtype=np.uint8)
+        for start in range(0, len(block), _VIGENERE_BLOCK_SIZE):
+            stop = start + _VIGENERE_BLOCK_SIZE
+            offset = _vigenere_numpy_block(block[start:stop], target[start:stop],
+                                           shifts, wrap, offset)
+        return offset
+
+    for i, byte in enumerate(data):
+        if 65 <= byte <= 90 or 97 <= byte <= 122:
+            base = byte & 0xE0 # 64 for uppercase, 96 for lowercase
+            byte = base + (byte - base - 1 + shifts[offset % len(shifts)]) % 26 + 1
+            offset += 1
+        out[i] = byte
+    return offset
+
+# Caesar and affine write into an output buffer this many bytes at a time,
+# so the working data stays in the CPU cache
+_BYTES_BLOCK_SIZE = 64 * 1024
+
+def _bytes_transformer(cipher, op, key):
+    """
+    Build apply(data, out=None) for one cipher and key.
+
+    apply() encrypts or decrypts one chunk of bytes. Without out it
+    returns new bytes; with out it writes the result into the start of
+    that writable buffer instead. For Vigenère the keyword position is
+    carried from one call to the next, so a file can be processed as a
+    series of chunks.
+    """
+    if op not in ('encrypt', 'decrypt'):
+        raise ValueError("op must be 'encrypt' or 'decrypt'")
+    encrypt = op == 'encrypt'
+
+    if cipher == 'vigenere':
+        compiled = VigenereKey(key)
+        shifts = compiled.shifts if encrypt else compiled.decrypt_shifts
+        offset = 0 # Keyword position, carried across calls
+
+        def apply(data, out=None):
+            nonlocal offset
+            target = bytearray(len(data)) if out is None else out
+            offset = _vigenere_letters_into(data, target, shifts, offset)
+            return bytes(target) if out is None else out
+        return apply
+
+    if cipher == 'caesar':
+        table = _caesar_byte_table(key if encrypt else -key)
+    elif cipher == 'affine':
+        table = _affine_byte_tables(*key)[0 if encrypt else 1]
+    else:
+        raise ValueError(f"Cipher '{cipher}' has no byte-level version")
+
+    table_array = np.frombuffer(table, dtype=np.uint8) if np is not None else None
+
+    def apply(data, out=None):
+        if out is None:
+            # bytes() is free when data is already bytes
+            return bytes(data).translate(table)
+
+        # Work through the data a cache-sized block at a time (a whole
+        # window at once is about twice as slow)
+        size = len(data)
+        if size == 0:
+            return out
+        if table_array is not None:
+            # Look every byte up in the table straight into out, with no
+            # intermediate copy
+            source = np.frombuffer(data, dtype=np.uint8)
+            target = np.frombuffer(out, dtype=np.uint8, count=size)
+            for start in range(0, size, _BYTES_BLOCK_SIZE):
+                stop = start + _BYTES_BLOCK_SIZE
+                np.take(table_array, source[start:stop], out=target[start:stop])
+        else:
+            # bytes.translate() only works on bytes, so each block is
+            # copied once on its way in
+            data, out_view = memoryview(data), memoryview(out)
+            for start in range(0, size, _BYTES_BLOCK_SIZE):
+                stop = min(start + _BYTES_BLOCK_SIZE, size)
+                out_view[start:stop] = bytes(data[start:stop]).translate(table)
+        return out
+    return apply
+
+def _apply_bytes_cipher(cipher, op, key, data, out):
+    """
+    Shared body of the *_bytes() functions: accept any buffer and check
+    that out (if given) is big enough.
+    """
+    data = memoryview(data).cast('B') # Any buffer, viewed as flat bytes
+    if out is not None and memoryview(out).nbytes < len(data):
+        raise ValueError("out must be at least as long as the data")
+    return _bytes_transformer(cipher, op, key)(data, out)
+
+def caesar_encrypt_bytes(data, shift_key, out=None):
+    """
+    CAESAR CIPHER ON BYTES
+    ======================
+    
+    The same as caesar_encrypt(), but for bytes: ASCII letters are shifted
+    (and uppercased), every other byte is left alone.
+    
+    Parameters:
+    - data: bytes, bytearray, memoryview or any other buffer
+    - shift_key (int): How many positions to shift each letter
+    - out (bytearray, optional): Write the result here instead of
+      returning new bytes. It may be data itself to work in place.
+    
+    Returns:
+    - bytes, or out if it was given
+    """
+    return _apply_bytes_cipher('caesar', 'encrypt', shift_key, data, out)
+
+def caesar_decrypt_bytes(data, shift_key, out=None):
+    """
+    Byte-level caesar_decrypt(); see caesar_encrypt_bytes().
+    """
+    return _apply_bytes_cipher('caesar', 'decrypt', shift_key, data, out)
+
+def vigenere_encrypt_bytes(data, keyword, out=None):
+    """
+    VIGENÈRE CIPHER ON BYTES
+    ========================
+    
+    The same as vigenere_encrypt(), but for bytes. Only ASCII letters use
+    up a keyword letter, so UTF-8 text with accented letters comes out
+    differently from the str version. With out, the NumPy engine writes
+    the shifted letters straight into that buffer.
+    
+    Parameters:
+    - data: bytes, bytearray, memoryview or any other buffer
+    - keyword (str): The keyword; only its letters are used
+    - out (bytearray, optional): Write the result here instead of
+      returning new bytes. It may be data itself to work in place.
+    
+    Returns:
+    - bytes, or out if it was given
+    """
+    return _apply_bytes_cipher('vigenere', 'encrypt', keyword, data, out)
+
+def vigenere_decrypt_bytes(data, keyword, out=None):
+    """
+    Byte-level vigenere_decrypt(); see vigenere_encrypt_bytes().
+    """
+    return _apply_bytes_cipher('vigenere', 'decrypt', keyword, data, out)
+
+def affine_encrypt_bytes(data, a, b, out=None):
+    """
+    AFFINE CIPHER ON BYTES
+    ======================
+    
+    The same as affine_encrypt(), but for bytes. Case is preserved and
+    every byte that isn't an ASCII letter is left alone.
+    
+    Parameters:
+    - data: bytes, bytearray, memoryview or any other buffer
+    - a (int): Multiplicative key, must be coprime with 26
+    - b (int): Additive key
+    - out (bytearray, optional): Write the result here instead of
+      returning new bytes. It may be data itself to work in place.
+    
+    Returns:
+    - bytes, or out if it was given
+    """
+    return _apply_bytes_cipher('affine', 'encrypt', (a, b), data, out)
+
+def affine_decrypt_bytes(data, a, b, out=None):
+    """
+    Byte-level affine_decrypt(); see affine_encrypt_bytes().
+    """
+    return _apply_bytes_cipher('affine', 'decrypt', (a, b), data, out)
+
+
+# =============================================================================
+# STREAMING (FILES)
+# =============================================================================
+
+# Ciphers that can process a file a chunk at a time
+STREAM_CIPHERS = ('caesar', 'vigenere', 'affine')
+
+def stream_transform(cipher, op, key, chunks):
+    """
+    STREAMING ENCRYPTION / DECRYPTION
+    =================================
+    
+    Encrypt or decrypt a file that arrives as an iterable of bytes chunks,
+    yielding the output chunk by chunk. Only one chunk is ever held in
+    memory, so files of any size can be processed.
+    
+    Only ASCII letters are changed; every other byte (including UTF-8
+    encoded non-English letters) passes through unchanged. For Vigenère,
+    the keyword position is carried over from one chunk to the next, so
+    chunk boundaries make no difference to the result.
+    
+    Parameters:
+    - cipher (str): 'caesar', 'vigenere' or 'affine'
+    - op (str): 'encrypt' or 'decrypt'
+    - key: shift (caesar), keyword (vigenere) or (a, b) (affine)
+    - chunks (iterable): bytes-like objects (bytes, bytearray or
+      memoryview, e.g. windows onto a memory-mapped file)
+    """
+    if cipher not in STREAM_CIPHERS:
+        raise ValueError(f"Cipher '{cipher}' can't be streamed")
+    apply = _bytes_transformer(cipher, op, key)
+    return (apply(chunk) for chunk in chunks)
+
+
+# =============================================================================
+# CRYPTANALYSIS
+# =============================================================================
+
+# How often each letter A-Z appears in typical English text, in percent
+ENGLISH_LETTER_FREQUENCIES = [
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153,
+    0.772, 4.025, 2.406, 6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056,
+    2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+]
+_ENGLISH_PROBABILITIES = [f / sum(ENGLISH_LETTER_FREQUENCIES) for f in ENGLISH_LETTER_FREQUENCIES]
+_LOG_ENGLISH_PROBABILITIES = [math.log(p) for p in _ENGLISH_PROBABILITIES]
+
+# Row s lists where each plaintext letter's count sits in the ciphertext
+# histogram if the text was shifted by s: plaintext i came from (i + s) % 26
+_SHIFT_ROTATIONS = [[(i + s) % 26 for i in range(26)] for s in range(26)]
+if np is not None:
+    _SHIFT_ROTATIONS_ARRAY = np.array(_SHIFT_ROTATIONS)
+    _LOG_ENGLISH_ARRAY = np.array(_LOG_ENGLISH_PROBABILITIES)
+    _INVERSE_ENGLISH_ARRAY = 1 / np.array(_ENGLISH_PROBABILITIES)
+
+def letter_counts(text):
+    """
+    Count each letter A-Z in text, ignoring case. text may be a str or
+    any bytes-like object; only ASCII letters are counted.
+    
+    Returns a list of 26 counts, one pass over the text.
+    """
+    data = text.encode('utf-8') if isinstance(text, str) else memoryview(text).cast('B')
+    if np is not None:
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        return (counts[65:91] + counts[97:123]).tolist()
+
+    # bytes.count() scans in C, so 52 scans still beat one Python loop
+    data = bytes(data)
+    return [data.count(upper) + data.count(upper + 32) for upper in range(65, 91)]
+
+def _shift_scores(counts):
+    """
+    Score all 26 Caesar shifts of a letter histogram at once.
+    
+    Shifting a text only rotates its histogram, so instead of decrypting
+    26 times we build the 26 rotations as one 26x26 matrix and multiply
+    it by English's log letter probabilities. Entry s of the result is
+    the log-likelihood that undoing shift s gives English.
+    
+    With NumPy, counts may have any number of leading dimensions (one
+    histogram per row), and so does the result.
+    """
+    if np is not None:
+        rotated = np.asarray(counts, dtype=np.float64)[..., _SHIFT_ROTATIONS_ARRAY]
+        return rotated @ _LOG_ENGLISH_ARRAY
+    return [sum(counts[source] * log_p
+                for source, log_p in zip(rotation, _LOG_ENGLISH_PROBABILITIES))
+            for rotation in _SHIFT_ROTATIONS]
+
+def _shift_chi_squared(counts):
+    """
+    Chi-squared distance from English for all 26 shifts of a histogram
+    (lower means more English-like). Uses the same rotation trick:
+    sum((observed - expected)^2 / expected) = sum(observed^2 / expected) - total.
+    """
+    total = sum(counts)
+    if np is not None:
+        rotated = np.asarray(counts, dtype=np.float64)[_SHIFT_ROTATIONS_ARRAY]
+        return ((rotated * rotated) @ _INVERSE_ENGLISH_ARRAY / total - total).tolist()
+    return [sum(counts[source] ** 2 / p
+                for source, p in zip(rotation, _ENGLISH_PROBABILITIES)) / total - total
+            for rotation in _SHIFT_ROTATIONS]
+
+def caesar_crack(cipher_text, top=None):
+    """
+    CAESAR CIPHER CRACKER
+    =====================
+    
+    Break a Caesar cipher without the key by trying all 26 shifts and
+    ranking them by how much the result looks like English.
+    
+    The letter histogram is counted once, and every shift is then scored
+    from that histogram alone (see _shift_scores), so a megabyte of text
+    takes about as long as one pass to count its letters. If a quadgram
+    table has been built (see build_quadgram_table), the shifts are then
+    put in order by the quadgram fitness of the start of each decryption
+    instead, which is more reliable on short messages.
+    
+    Parameters:
+    - cipher_text (str or bytes): The encrypted text
+    - top (int, optional): Only return this many candidates
+    
+    Returns:
+    - list of dicts, best first, each with:
+        'shift': the key to pass to caesar_decrypt()
+        'score': what the list is sorted by (higher is better): the
+            quadgram fitness if a table has been built, otherwise the
+            letter_score
+        'letter_score': average log-probability per letter
+        'chi_squared': chi-squared distance from English (lower is better)
+    """
+    counts = letter_counts(cipher_text)
+    total = sum(counts)
+    if total == 0:
+        raise ValueError("The text has no letters to analyse!")
+
+    scores = list(_shift_scores(counts))
+    chi_squared = _shift_chi_squared(counts)
+    ranked = sorted(range(26), key=lambda shift: scores[shift], reverse=True)
+    candidates = [{'shift': shift,
+                   'score': float(scores[shift]) / total,
+                   'letter_score': float(scores[shift]) / total,
+                   'chi_squared': float(chi_squared[shift])}
+                  for shift in ranked]
+
+    sample = _fitness_sample(cipher_text)
+    _rank_by_fitness(candidates,
+                     lambda candidate: caesar_decrypt_bytes(sample, candidate['shift']))
+    return candidates[:top]
+
+
+# All 312 affine keys, and for each one the plaintext letter that every
+# ciphertext letter y decrypts to: x = a^(-1) * (y - b) mod 26
+_AFFINE_KEYS = [(a, b) for a in AFFINE_VALID_A for b in range(26)]
+_AFFINE_DECRYPT_MAPS = [[mod_inverse(a, 26) * (y - b) % 26 for y in range(26)]
+                        for a, b in _AFFINE_KEYS]
+if np is not None:
+    # Row k is English's log-probabilities rearranged by key k's decryption
+    # map, so one matrix-vector product with the ciphertext histogram
+    # scores every key at once
+    _AFFINE_LOG_PROBABILITIES = _LOG_ENGLISH_ARRAY[np.array(_AFFINE_DECRYPT_MAPS)]
+    _AFFINE_INVERSE_PROBABILITIES = _INVERSE_ENGLISH_ARRAY[np.array(_AFFINE_DECRYPT_MAPS)]
+
+def affine_crack(cipher_text, top=5):
+    """
+    AFFINE CIPHER CRACKER
+    =====================
+    
+    Break an affine cipher by trying every key: 12 valid values of 'a'
+    times 26 values of 'b' makes only 312.
+    
+    Decrypting 312 times isn't needed. Each key only moves letters
+    around, so the ciphertext letters are counted once and every key is
+    scored by rearranging that one histogram (see _AFFINE_DECRYPT_MAPS).
+    After the counting pass the work is the same for any length of text.
+    If a quadgram table has been built, the best keys (at least
+    QUADGRAM_SHORTLIST of them) are then put in order by the quadgram
+    fitness of the start of their decryptions.
+    
+    Parameters:
+    - cipher_text (str or bytes): The encrypted text
+    - top (int, optional): Only return this many candidates
+    
+    Returns:
+    - list of dicts, best first, each with:
+        'a', 'b': the key to pass to affine_decrypt()
+        'score': what the list is sorted by (higher is better): the
+            quadgram fitness if a table has been built, otherwise the
+            letter_score
+        'letter_score': average log-probability per letter
+        'chi_squared': chi-squared distance from English (lower is better)
+    """
+    counts = letter_counts(cipher_text)
+    total = sum(counts)
+    if total == 0:
+        raise ValueError("The text has no letters to analyse!")
+
+    if np is not None:
+        histogram = np.array(counts, dtype=np.float64)
+        scores = (_AFFINE_LOG_PROBABILITIES @ histogram).tolist()
+        chi_squared = (_AFFINE_INVERSE_PROBABILITIES @ (histogram * histogram) / total - total).tolist()
+    else:
+        scores = [sum(count * _LOG_ENGLISH_PROBABILITIES[x] for count, x in zip(counts, mapping))
+                  for mapping in _AFFINE_DECRYPT_MAPS]
+        chi_squared = [sum(count * count / _ENGLISH_PROBABILITIES[x]
+                           for count, x in zip(counts, mapping)) / total - total
+                       for mapping in _AFFINE_DECRYPT_MAPS]
+
+    ranked = sorted(range(len(_AFFINE_KEYS)), key=lambda k: scores[k], reverse=True)
+    candidates = [{'a': _AFFINE_KEYS[k][0],
+                   'b': _AFFINE_KEYS[k][1],
+                   'score': scores[k] / total,
+                   'letter_score': scores[k] / total,
+                   'chi_squared': chi_squared[k]}
+                  for k in ranked[:max(top or len(ranked), QUADGRAM_SHORTLIST)]]
+
+    # Every candidate that could be returned is re-ranked, so the list
+    # is always in order of its 'score'
+    sample = _fitness_sample(cipher_text)
+    _rank_by_fitness(candidates,
+                     lambda candidate: affine_decrypt_bytes(sample, candidate['a'], candidate['b']))
+    return candidates[:top]
+
+# Index of coincidence: the chance that two letters picked at random from
+# a text are the same. English is around 0.066, random letters 1/26.
+ENGLISH_IOC = 0.0667
+
+# Key-length statistics are computed from at most this many letters.
+# That is plenty to tell lengths 1-40 apart, and keeps long texts fast.
+VIGENERE_KEY_LENGTH_SAMPLE = 32768
+
+def _letter_indices(text):
+    """
+    The ASCII letters of text as numbers 0-25 (case ignored), in order:
+    a NumPy uint8 array, or a list without NumPy.
+    """
+    data = text.encode('utf-8') if isinstance(text, str) else bytes(memoryview(text).cast('B'))
+    if np is not None:
+        data = np.frombuffer(data, dtype=np.uint8) | 0x20 # Fold to lowercase
+        return data[(data - 97) < 26] - 97
+    return [byte - 97 for byte in data.lower() if 97 <= byte <= 122]
+
+def _average_ioc(columns):
+    """
+    Average index of coincidence of a set of column histograms, skipping
+    columns with fewer than two letters.
+    """
+    if np is not None:
+        columns = np.asarray(columns, dtype=np.float64)
+        totals = columns.sum(axis=1)
+        usable = totals >= 2
+        if not usable.any():
+            return 0.0
+        pairs = (columns * (columns - 1)).sum(axis=1)[usable]
+        return float((pairs / (totals[usable] * (totals[usable] - 1))).mean())
+
+    iocs = [sum(count * (count - 1) for count in column) / (sum(column) * (sum(column) - 1))
+            for column in columns if sum(column) >= 2]
+    return sum(iocs) / len(iocs) if iocs else 0.0
+
+def _column_counts(letters, key_length):
+    """
+    Letter histograms of the key_length columns: column i holds every
+    letter that was shifted by the i-th keyword letter.
+    """
+    if np is not None:
+        columns = np.arange(len(letters)) % key_length
+        return np.bincount(columns * 26 + letters,
+                           minlength=26 * key_length).reshape(key_length, 26)
+    counts = [[0] * 26 for _ in range(key_length)]
+    for position, letter in enumerate(letters):
+        counts[position % key_length][letter] += 1
+    return counts
+
+def _kasiski_distances(letters):
+    """
+    Distances between repeats of the same three-letter sequence. A
+    repeated word that lines up with the same part of the keyword gives
+    a repeat whose distance is a multiple of the key length.
+    """
+    if np is not None:
+        letters = letters.astype(np.int32) # Trigram codes go up to 26^3
+        codes = letters[:-2] * 676 + letters[1:-1] * 26 + letters[2:]
+        order = np.argsort(codes, kind='stable') # Stable: repeats stay in text order
+        repeated = codes[order][1:] == codes[order][:-1]
+        return order[1:][repeated] - order[:-1][repeated]
+
+    distances, last_seen = [], {}
+    for position in range(len(letters) - 2):
+        trigram = tuple(letters[position:position + 3])
+        if trigram in last_seen:
+            distances.append(position - last_seen[trigram])
+        last_seen[trigram] = position
+    return distances
+
+def vigenere_key_lengths(cipher_text, max_key_length=40):
+    """
+    VIGENÈRE KEY LENGTH DETECTION
+    =============================
+    
+    Estimate how long the keyword is, using two classic tests:
+    
+    1. Index of coincidence: split the letters into L columns (every L-th
+       letter). If L is the key length, each column is a Caesar cipher of
+       English and its index of coincidence is close to English's 0.066;
+       otherwise the columns look random (about 0.038).
+    2. Kasiski examination: repeated three-letter sequences tend to be
+       a multiple of the key length apart, so count how many of those
+       distances L divides.
+    
+    Multiples of the real length score almost as well on the index of
+    coincidence, but Kasiski distances are divisible by them less often,
+    so the two are combined, and the shortest of the near-best lengths
+    is ranked first.
+    
+    With NumPy the column histograms for every length are counted in one
+    np.bincount() call over the (sampled) text.
+    
+    Returns:
+    - list of dicts for lengths 1..max_key_length, most likely first, with:
+        'length', 'ioc' (average over the columns) and
+        'kasiski' (fraction of repeat distances that length divides)
+    """
+    return _rank_key_lengths(_key_length_stats(_letter_indices(cipher_text), max_key_length))
+
+def _rank_key_lengths(stats):
+    """
+    Order key length statistics from most to least likely.
+    """
+    strength = [s['ioc'] * (1 + s['kasiski']) for s in stats]
+    best = max(strength)
+    # Shortest lengths that are nearly as good as the best come first
+    return [s for _, s in sorted(zip(strength, stats),
+                                 key=lambda pair: (pair[0] < 0.9 * best, -pair[0]))]
+
+def _key_length_stats(letters, max_key_length):
+    """
+    Key length statistics (see vigenere_key_lengths) for text already
+    turned into letter indices, in order of length.
+    """
+    letters = letters[:VIGENERE_KEY_LENGTH_SAMPLE]
+    max_key_length = max(1, min(max_key_length, len(letters) // 2))
+    lengths = range(1, max_key_length + 1)
+
+    if np is not None:
+        # Give every (length, column, letter) triple its own bin. Length L's
+        # bins start after the 26 * (1 + 2 + ... + (L-1)) bins of the shorter ones.
+        sizes = np.arange(1, max_key_length + 1, dtype=np.int32)[:, None]
+        bins = np.arange(len(letters), dtype=np.int32) % sizes
+        bins *= 26
+        bins += letters
+        bins += 13 * sizes * (sizes - 1)
+        counts = np.bincount(bins.ravel(), minlength=13 * max_key_length * (max_key_length + 1))
+        histograms = [counts[13 * size * (size - 1):13 * size * (size + 1)].reshape(size, 26)
+                      for size in lengths]
+    else:
+        histograms = [_column_counts(letters, size) for size in lengths]
+
+    distances = _kasiski_distances(letters)
+    if np is not None and len(distances):
+        # Count each distance once; the multiples of L are then every L-th bin
+        spread = np.bincount(distances)
+        divisible = [spread[::size].sum() / len(distances) for size in lengths]
+    else:
+        divisible = [sum(distance % size == 0 for distance in distances) / len(distances)
+                     if len(distances) else 0.0 for size in lengths]
+
+    return [{'length': size,
+             'ioc': _average_ioc(columns),
+             'kasiski': float(divisible[size - 1])}
+            for size, columns in zip(lengths, histograms)]
+
+def _shortest_period(key):
+    """
+    'LEMONLEMON' -> 'LEMON': twice the key length also fits the text, so
+    collapse keys that are just a shorter key repeated.
+    """
+    for period in range(1, len(key)):
+        if len(key) % period == 0 and key == key[:period] * (len(key) // period):
+            return key[:period]
+    return key
+
+def vigenere_crack(cipher_text, max_key_length=40, top=3):
+    """
+    VIGENÈRE CIPHER CRACKER
+    =======================
+    
+    Recover a Vigenère keyword from the ciphertext alone.
+    
+    1. Rank the possible key lengths (see vigenere_key_lengths()).
+    2. For each likely length, every column is a Caesar cipher: count its
+       letters once and pick the shift that looks most like English
+       (the same rotated-histogram scoring as caesar_crack()).
+    3. If a quadgram table has been built, put the candidate keywords in
+       order by the quadgram fitness of the start of their decryptions
+       (see quadgram_fitness). Otherwise they stay in key length order:
+       a longer keyword always fits the letter counts at least as well,
+       so letter scores for different lengths can't be compared.
+    
+    Parameters:
+    - cipher_text (str or bytes): The encrypted text. A few hundred
+      letters per keyword letter is plenty; very short texts may fail.
+    - max_key_length (int): Longest keyword to consider
+    - top (int): How many key lengths to try. Lengths that give the same
+      keyword (a repeated shorter one) are only listed once, so fewer
+      candidates may come back.
+    
+    Returns:
+    - list of dicts, best first, each with:
+        'key': the keyword to pass to vigenere_decrypt()
+        'score': the quadgram fitness that the list is sorted by if a
+            table has been built, otherwise the letter_score
+        'letter_score': average log-probability per letter after decryption
+        'ioc': index of coincidence for that key length
+    """
+    letters = _letter_indices(cipher_text)
+    if len(letters) < 2:
+        raise ValueError("The text has too few letters to analyse!")
+
+    candidates = []
+    for stats in _rank_key_lengths(_key_length_stats(letters, max_key_length))[:top]:
+        size = stats['length']
+        # Every column is a Caesar cipher: score all 26 shifts of each at once
+        columns = _column_counts(letters, size)
+        if np is not None:
+            scores = _shift_scores(columns) # One row of 26 scores per column
+            shifts = scores.argmax(axis=1).tolist()
+            total_score = float(scores.max(axis=1).sum())
+        else:
+            scores = [_shift_scores(column) for column in columns]
+            shifts = [max(range(26), key=column.__getitem__) for column in scores]
+            total_score = sum(map(max, scores))
+
+        key = _shortest_period("".join(ALPHABET[shift] for shift in shifts))
+        if all(candidate['key'] != key for candidate in candidates):
+            candidates.append({'key': key,
+                               'score': total_score / len(letters),
+                               'letter_score': total_score / len(letters),
+                               'ioc': stats['ioc']})
+
+    sample = _fitness_sample(cipher_text)
+    return _rank_by_fitness(candidates,
+                            lambda candidate: vigenere_decrypt_bytes(sample, candidate['key']))
+
+
+# bytes.translate() tables that turn A-Z and a-z into 0-25 and delete
+# every other byte, leaving just the letters as numbers
+_LETTERS_TO_INDICES = bytes.maketrans(ALPHABET.encode('ascii') + ALPHABET.lower().encode('ascii'),
+                                      bytes(range(26)) * 2)
+_NOT_LETTERS = bytes(byte for byte in range(256)
+                     if not (65 <= byte <= 90 or 97 <= byte <= 122))
+
+# Default size of the pieces a str or bytes text is split into for
+# frequency_analysis(), so memory stays bounded for huge inputs
+ANALYSIS_CHUNK_SIZE = 1024 * 1024
+
+# Letters are counted this many at a time, so NumPy's temporary arrays
+# stay small enough to sit in the CPU cache (about twice as fast as
+# counting a megabyte at once)
+_ANALYSIS_BLOCK_SIZE = 64 * 1024
+
+def _ngram_name(code, n):
+    """
+    Turn a base-26 n-gram code back into letters: 19 * 26 + 7 -> 'TH'.
+    """
+    letters = []
+    for _ in range(n):
+        code, letter = divmod(code, 26)
+        letters.append(ALPHABET[letter])
+    return "".join(reversed(letters))
+
+def frequency_analysis(chunks, top=20):
+    """
+    FREQUENCY ANALYSIS
+    ==================
+    
+    Count the letters, pairs of letters (bigrams) and triples (trigrams)
+    of a text, and work out its index of coincidence and entropy - the
+    numbers you need to start breaking a classical cipher by hand.
+    
+    Only letters count, case is ignored, and everything else (spaces,
+    punctuation) is skipped, so "THE CAT" has the bigram "EC".
+    
+    The text can arrive in chunks (e.g. an upload being read a piece at a
+    time), so memory use stays the same however long it is. Each chunk
+    goes through bytes.translate() (letters to 0-25, everything else
+    deleted), then one np.bincount() of its trigram codes. Bigram and
+    letter counts are sums of the trigram counts, plus the last two
+    letters, which are also carried over to the next chunk so n-grams
+    crossing a chunk boundary are counted exactly once.
+    
+    Parameters:
+    - chunks: a str, a bytes-like object, or an iterable of either
+    - top (int): How many of the most common bigrams and trigrams to list
+    
+    Returns:
+    - dict with:
+        'letters': number of letters
+        'unigrams': {letter: count} for A-Z
+        'bigrams', 'trigrams': [[ngram, count], ...], most common first
+        'ioc': index of coincidence (English is about 0.067)
+        'entropy': Shannon entropy in bits per letter (English is about 4.2)
+    """
+    if isinstance(chunks, str):
+        chunks = chunks.encode('utf-8')
+    if isinstance(chunks, (bytes, bytearray, memoryview)):
+        data = memoryview(chunks).cast('B')
+        chunks = (data[start:start + ANALYSIS_CHUNK_SIZE]
+                  for start in range(0, len(data), ANALYSIS_CHUNK_SIZE))
+
+    trigrams = np.zeros(26 ** 3, dtype=np.int64) if np is not None else [0] * 26 ** 3
+    tail = b"" # The last two letters seen so far
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        letters = tail + bytes(chunk).translate(_LETTERS_TO_INDICES, _NOT_LETTERS)
+        if np is not None:
+            letter_array = np.frombuffer(letters, dtype=np.uint8)
+            for start in range(0, len(letters) - 2, _ANALYSIS_BLOCK_SIZE):
+                # Blocks overlap by two letters so no trigram is missed
+                block = letter_array[start:start + _ANALYSIS_BLOCK_SIZE + 2].astype(np.uint16)
+                # 25 * 676 + 25 * 26 + 25 = 17575 still fits in 16 bits
+                trigrams += np.bincount(block[:-2] * 676 + block[1:-1] * 26 + block[2:],
+                                        minlength=26 ** 3)
+        else:
+            for first, second, third in zip(letters, letters[1:], letters[2:]):
+                trigrams[(first * 26 + second) * 26 + third] += 1
+        tail = letters[-2:]
+
+    # Every trigram starts with a bigram and a letter; only the final two
+    # letters (and the bigram they make) aren't the start of a trigram
+    if np is not None:
+        bigrams = trigrams.reshape(676, 26).sum(axis=1)
+        unigrams = bigrams.reshape(26, 26).sum(axis=1)
+    else:
+        bigrams = [sum(trigrams[code * 26:code * 26 + 26]) for code in range(676)]
+        unigrams = [sum(bigrams[code * 26:code * 26 + 26]) for code in range(26)]
+    for letter in tail:
+        unigrams[letter] += 1
+    if len(tail) == 2:
+        bigrams[tail[0] * 26 + tail[1]] += 1
+
+    unigrams = [int(count) for count in unigrams]
+    total = sum(unigrams)
+
+    def most_common(counts, n):
+        codes = sorted(range(len(counts)), key=lambda code: counts[code], reverse=True)
+        return [[_ngram_name(code, n), int(counts[code])] for code in codes[:top] if counts[code]]
+
+    return {
+        'letters': total,
+        'unigrams': dict(zip(ALPHABET, unigrams)),
+        'bigrams': most_common(bigrams, 2),
+        'trigrams': most_common(trigrams, 3),
+        'ioc': sum(count * (count - 1) for count in unigrams) / (total * (total - 1)) if total > 1 else 0.0,
+        'entropy': sum((-count / total * math.log2(count / total) for count in unigrams if count), 0.0),
+    }
+
+
+# =============================================================================
+# QUADGRAM FITNESS
+# =============================================================================
+
+# Letter frequencies alone can't tell "THEQUICK" from "HTEQIUCK". Scoring
+# every run of four letters (quadgram) against how often it appears in
+# English can, so the crackers use it to pick between their best guesses.
+#
+# The table holds log10(probability) for every quadgram AAAA..ZZZZ as one
+# flat array of 26^4 float32 values (1.8 MB), at index
+# ((a * 26 + b) * 26 + c) * 26 + d. On disk it is the same raw array, so
+# it can be memory-mapped: every process that loads it shares one copy
+# in the operating system's page cache.
+
+QUADGRAM_COUNT = 26 ** 4
+
+# Where load_quadgram_table() looks for the table by default. Build it
+# from any large English text with build_quadgram_table().
+QUADGRAM_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'english_quadgrams.f32')
+
+# Loaded tables, keyed by path. Nothing is read until a table is first
+# used, so importing this module (and starting the app) stays fast.
+_QUADGRAM_TABLES = {}
+_QUADGRAM_LOCK = threading.Lock()
+
+def _quadgram_codes(letters):
+    """
+    Table index of every four-letter window of a letter-index sequence.
+    """
+    if np is not None:
+        letters = letters.astype(np.int32)
+        return ((letters[:-3] * 26 + letters[1:-2]) * 26 + letters[2:-1]) * 26 + letters[3:]
+
+    codes, code = [], 0
+    for position, letter in enumerate(letters):
+        code = (code * 26 + letter) % QUADGRAM_COUNT # Drop the oldest letter
+        if position >= 3:
+            codes.append(code)
+    return codes
+
+def build_quadgram_table(corpus, path=None):
+    """
+    BUILD A QUADGRAM TABLE
+    ======================
+    
+    Count every quadgram in a large sample of English (a few megabytes of
+    books works well) and write the log10 probabilities to path (default
+    QUADGRAM_TABLE_PATH). Quadgrams that never appear get a small floor
+    probability instead of log(0).
+    
+    Parameters:
+    - corpus (str or bytes): English text; only its letters are used
+    - path (str, optional): Where to write the table
+    
+    Returns:
+    - str: The path written
+    """
+    path = path or QUADGRAM_TABLE_PATH
+    codes = _quadgram_codes(_letter_indices(corpus))
+    if len(codes) == 0:
+        raise ValueError("The corpus has too few letters!")
+
+    if np is not None:
+        counts = np.bincount(codes, minlength=QUADGRAM_COUNT)
+        total = counts.sum()
+        table = np.full(QUADGRAM_COUNT, math.log10(0.01 / total), dtype='<f4')
+        seen = counts > 0
+        table[seen] = np.log10(counts[seen] / total)
+        data = table.tobytes()
+    else:
+        counts = [0] * QUADGRAM_COUNT
+        for code in codes:
+            counts[code] += 1
+        total = len(codes)
+        floor = math.log10(0.01 / total)
+        table = array.array('f', (math.log10(count / total) if count else floor
+                                  for count in counts))
+        if sys.byteorder == 'big':
+            table.byteswap() # The file is always little-endian
+        data = table.tobytes()
+
+    # Write to a temporary file first so readers never see half a table
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, 'wb') as table_file:
+        table_file.write(data)
+    os.replace(temporary, path)
+
+    with _QUADGRAM_LOCK:
+        _QUADGRAM_TABLES.pop(path, None) # Reload the new table next time
+    return path
+
+def load_quadgram_table(path=None):
+    """
+    LOAD THE QUADGRAM TABLE
+    =======================
+    
+    Memory-map the quadgram table at path (default QUADGRAM_TABLE_PATH),
+    loading it only the first time it's asked for. With NumPy this is an
+    np.memmap; without, a float memoryview over an mmap.
+    
+    Raises FileNotFoundError if the table hasn't been built yet.
+    """
+    path = path or QUADGRAM_TABLE_PATH
+    with _QUADGRAM_LOCK:
+        if path in _QUADGRAM_TABLES:
+            return _QUADGRAM_TABLES[path]
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No quadgram table at {path} - "
+                                    "build one with build_quadgram_table()")
+        if os.path.getsize(path) != 4 * QUADGRAM_COUNT:
+            raise ValueError(f"{path} is not a quadgram table (expected {4 * QUADGRAM_COUNT} bytes)")
+        if np is not None:
+            table = np.memmap(path, dtype='<f4', mode='r', shape=(QUADGRAM_COUNT,))
+        else:
+            with open(path, 'rb') as table_file:
+                mapped = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if sys.byteorder == 'big':
+                table = array.array('f', mapped)
+                table.byteswap()
+            else:
+                table = memoryview(mapped).cast('f')
+
+        _QUADGRAM_TABLES[path] = table
+        return table
+
+def quadgram_fitness(text, table=None):
+    """
+    QUADGRAM FITNESS
+    ================
+    
+    How much text looks like English: the average log10 probability of
+    its quadgrams (letters only, case ignored). English scores around -4
+    to -5 with a real table; gibberish much lower.
+    
+    The letters become base-26 numbers, every window of four is turned
+    into its table index with a few array operations, and the matching
+    table entries are summed.
+    
+    Parameters:
+    - text (str or bytes): Text to score; needs at least four letters
+    - table (optional): A table from load_quadgram_table(); by default
+      the shared one is loaded on first use
+    """
+    codes = _quadgram_codes(_letter_indices(text))
+    if len(codes) == 0:
+        raise ValueError("Need at least four letters to score!")
+    table = load_quadgram_table() if table is None else table
+
+    if np is not None:
+        return float(table[codes].sum(dtype=np.float64)) / len(codes)
+    return sum(table[code] for code in codes) / len(codes)
+
+# The crackers re-rank at least this many of their best candidates by the
+# quadgram fitness of this much decrypted text
+QUADGRAM_SHORTLIST = 26
+QUADGRAM_SAMPLE_CHARS = 4096
+
+def _rank_by_fitness(candidates, decrypt):
+    """
+    Re-rank candidates in place by quadgram fitness: every candidate's
+    'score' becomes quadgram_fitness(decrypt(candidate)) and the list is
+    sorted by it, best first.
+    
+    Without a built quadgram table, or if a decryption has fewer than
+    four letters to score, the candidates are left exactly as they were.
+    Returns candidates.
+    """
+    try:
+        table = load_quadgram_table()
+    except FileNotFoundError:
+        return candidates
+
+    try:
+        fitness = [quadgram_fitness(decrypt(candidate), table) for candidate in candidates]
+    except ValueError:
+        return candidates
+    for candidate, score in zip(candidates, fitness):
+        candidate['score'] = score
+    candidates.sort(key=lambda candidate: candidate['score'], reverse=True)
+    return candidates
+
+def _fitness_sample(cipher_text):
+    """
+    The start of a ciphertext as bytes, for the quadgram re-ranking.
+    """
+    if isinstance(cipher_text, str):
+        return cipher_text[:QUADGRAM_SAMPLE_CHARS].encode('utf-8')
+    return bytes(memoryview(cipher_text).cast('B')[:QUADGRAM_SAMPLE_CHARS])
+
+
+# =============================================================================
+# TESTING FUNCTIONS
+# =============================================================================
+
+def test_caesar_cipher():
+    """
+    Test function for the Caesar cipher to make sure it works correctly.
+    You can run this to verify your implementation!
+    """
+    print("Testing Caesar Cipher...")
+    
+    # Test case 1: Basic encryption
+    plain = "HELLO WORLD"
+    shift = 3
+    encrypted = caesar_encrypt(plain, shift)
+    decrypted = caesar_decrypt(encrypted, shift)
+    
+    print(f"Original: {plain}")
+    print(f"Encrypted (shift {shift}): {encrypted}")
+    print(f"Decrypted: {decrypted}")
+    print(f"Test passed: {plain == decrypted}")
+    print()
+    
+    # Test case 2: Wrap-around
+    plain = "XYZ"
+    shift = 5
     encrypted = caesar_encrypt(plain, shift)
     decrypted = caesar_decrypt(encrypted, shift)
     
@@ -491,6 +2695,120 @@ def test_rsa_cipher():
     print(f"Decrypted: {decrypted}")
     print(f"Test passed: {message == decrypted}")
 
+def test_vigenere_parallel():
+    print("\nTesting Parallel Vigenère...")
+    plain = "Attack at dawn! Café, naïve. " * 20
+    keyword = "LEMON"
+    # Tiny chunks so the keyword position has to carry across many of them
+    encrypted = vigenere_encrypt_parallel(plain, keyword, workers=2, chunk_size=7)
+    decrypted = vigenere_decrypt_parallel(encrypted, keyword, workers=2, chunk_size=7)
+    same_encrypt = encrypted == vigenere_encrypt(plain, keyword)
+    same_decrypt = decrypted == vigenere_decrypt(encrypted, keyword)
+    
+    print(f"Same as vigenere_encrypt(): {same_encrypt}")
+    print(f"Same as vigenere_decrypt(): {same_decrypt}")
+    print(f"Test passed: {same_encrypt and same_decrypt}")
+
+def test_rsa_crt():
+    print("\nTesting RSA CRT Decryption...")
+    public, private = rsa_generate_keys(61, 53, extended=True)
+    key = RSAKey.from_tuple(private)
+    d, n = private[0], private[1]
+    
+    # Every ciphertext below n must decrypt exactly as plain pow() would
+    crt_matches = all(key.power(c) == pow(c, d, n) for c in range(n))
+    
+    print(f"Private key: {private}")
+    print(f"Test passed: {crt_matches}")
+
+def test_rsa_block_mode():
+    print("\nTesting RSA Block Mode...")
+    public, private = rsa_generate_keys(1000003, 999983) # n is just under 2^40
+    
+    # Longer than n, with multi-byte characters that can straddle two blocks
+    message = "Block mode: ünïcödé, emoji 🔐 and plain ASCII. " * 10
+    text_result = rsa_decrypt(rsa_encrypt(message, public, block_mode=True), private)
+    
+    # Bytes that aren't valid UTF-8 come back as bytes
+    data = bytes(range(256)) * 2
+    bytes_result = rsa_decrypt(rsa_encrypt(data, public, block_mode=True), private)
+    
+    print(f"Text round trip: {text_result == message}")
+    print(f"Binary round trip: {bytes_result == data}")
+    print(f"Test passed: {text_result == message and bytes_result == data}")
+
+def test_crackers():
+    print("\nTesting Crackers...")
+    plain = ("It was the best of times, it was the worst of times, it was the age "
+             "of wisdom, it was the age of foolishness, it was the epoch of belief, "
+             "it was the epoch of incredulity, it was the season of Light, it was "
+             "the season of Darkness, it was the spring of hope, it was the winter "
+             "of despair.")
+    
+    best_shift = caesar_crack(caesar_encrypt(plain, 7))[0]['shift']
+    best_affine = affine_crack(affine_encrypt(plain, 5, 8))[0]
+    best_keyword = vigenere_crack(vigenere_encrypt(plain, "LEMON"))[0]['key']
+    
+    print(f"Caesar shift 7 -> {best_shift}")
+    print(f"Affine (5, 8) -> ({best_affine['a']}, {best_affine['b']})")
+    print(f"Vigenère LEMON -> {best_keyword}")
+    recovered = (best_shift == 7 and (best_affine['a'], best_affine['b']) == (5, 8)
+                 and best_keyword == "LEMON")
+    print(f"Test passed: {recovered}")
+
+def test_frequency_analysis():
+    print("\nTesting Frequency Analysis...")
+    text = "The quick brown fox jumps over the lazy dog. " * 30
+    whole = frequency_analysis(text)
+    
+    # Splitting the text anywhere (even mid-word) must not change any count
+    chunked = [frequency_analysis(text[i:i + size] for i in range(0, len(text), size))
+               for size in (1, 2, 7, 100)]
+    
+    print(f"Letters: {whole['letters']}, top bigram: {whole['bigrams'][0]}")
+    print(f"Test passed: {all(result == whole for result in chunked)}")
+
+def test_batch_keyed():
+    print("\nTesting Batch With One Key Per Text...")
+    texts = ["Hello, World!", "abc xyz", "", "Zebra 123", "The quick brown fox"]
+    shifts = [3, 5, 7, 25, 13]
+    affine_keys = [(5, 8), (7, 3), (1, 0), (25, 1), (11, 6)]
+    
+    caesar_ok = (cipher_batch_keyed('caesar', 'encrypt', shifts, texts)
+                 == [caesar_encrypt(text, shift) for text, shift in zip(texts, shifts)])
+    encrypted = cipher_batch_keyed('affine', 'encrypt', affine_keys, texts)
+    affine_ok = (encrypted == [affine_encrypt(text, a, b) for text, (a, b) in zip(texts, affine_keys)]
+                 and cipher_batch_keyed('affine', 'decrypt', affine_keys, encrypted) == texts)
+    
+    print(f"Caesar matches caesar_encrypt(): {caesar_ok}")
+    print(f"Affine matches affine_encrypt() and decrypts: {affine_ok}")
+    print(f"Test passed: {caesar_ok and affine_ok}")
+
+def test_key_objects():
+    print("\nTesting Key Objects...")
+    plain = "Attack at Dawn, 10:45!"
+    
+    caesar = CaesarKey(3)
+    vigenere = VigenereKey("LEMON")
+    affine = AffineKey(5, 8)
+    rsa_public, rsa_private = rsa_generate_keys(61, 53)
+    rsa = RSAKey.from_tuple(rsa_public)
+    
+    results = {
+        'Caesar': (caesar.encrypt(plain) == caesar_encrypt(plain, 3)
+                   and caesar.decrypt(plain) == caesar_decrypt(plain, 3)),
+        'Vigenère': (vigenere.encrypt(plain) == vigenere_encrypt(plain, "LEMON")
+                     and vigenere.decrypt(plain) == vigenere_decrypt(plain, "LEMON")),
+        'Affine': (affine.encrypt(plain) == affine_encrypt(plain, 5, 8)
+                   and affine.decrypt(plain) == affine_decrypt(plain, 5, 8)),
+        'RSA': (rsa.encrypt(42) == rsa_encrypt(42, rsa_public)
+                and RSAKey.from_tuple(rsa_private).decrypt(2557) == rsa_decrypt(2557, rsa_private)),
+    }
+    
+    for name, same in results.items():
+        print(f"{name} key matches the function API: {same}")
+    print(f"Test passed: {all(results.values())}")
+
 def run_comprehensive_tests():
     """
     Comprehensive test suite for the Caesar cipher.
@@ -554,9 +2872,629 @@ def run_comprehensive_tests():
     # Test RSA cipher
     test_rsa_cipher()
     
+    # Test parallel Vigenère
+    test_vigenere_parallel()
+    
+    # Test CRT decryption
+    test_rsa_crt()
+    
+    # Test RSA block mode
+    test_rsa_block_mode()
+    
+    # Test the crackers
+    test_crackers()
+    
+    # Test frequency analysis
+    test_frequency_analysis()
+    
+    # Test per-text keys
+    test_batch_keyed()
+    
+    # Test the compiled key objects
+    test_key_objects()
+    
     print("\n" + "=" * 60)
     print("✅ ALL CIPHER TESTS COMPLETED")
 
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+def _caesar_encrypt_loop(plain_text, shift_key):
+    """
+    The original character-by-character Caesar implementation, kept only
+    as a baseline for benchmark_caesar().
+    """
+    plain_text = plain_text.upper()
+    encrypted_text = ""
+    for char in plain_text:
+        if char.isalpha():
+            encrypted_text += chr((ord(char) - ord('A') + shift_key) % 26 + ord('A'))
+        else:
+            encrypted_text += char
+    return encrypted_text
+
+def _throughput(func, text, *args, repeat=3):
+    """
+    Run func(text, *args) a few times and return the best throughput in MB/s.
+    """
+    size_mb = len(text.encode()) / (1024 * 1024)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text, *args)
+        best = min(best, time.perf_counter() - start)
+    return size_mb / best if best else float('inf')
+
+def benchmark_caesar(size_mb=4):
+    """
+    Compare the translation-table Caesar engine with the old per-character
+    loop and print the throughput of each in MB/s.
+    """
+    print(f"\nBenchmarking Caesar Cipher ({size_mb} MB of text)...")
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    text = sample * (size_mb * 1024 * 1024 // len(sample))
+
+    loop_speed = _throughput(_caesar_encrypt_loop, text, 3, repeat=1)
+    table_speed = _throughput(caesar_encrypt, text, 3)
+
+    print(f"  Per-character loop: {loop_speed:10.1f} MB/s")
+    print(f"  Translation tables: {table_speed:10.1f} MB/s")
+    print(f"  Speedup:            {table_speed / loop_speed:10.1f}x")
+
+def benchmark_vigenere(size_mb=4):
+    """
+    Compare the NumPy Vigenère engine with the pure Python loop and print
+    the throughput of each in MB/s.
+    """
+    global VIGENERE_NUMPY_THRESHOLD
+
+    print(f"\nBenchmarking Vigenère Cipher ({size_mb} MB of text)...")
+    if np is None:
+        print("  NumPy is not installed - skipping")
+        return
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    text = sample * (size_mb * 1024 * 1024 // len(sample))
+
+    # Temporarily disable the NumPy path to time the original loop
+    threshold = VIGENERE_NUMPY_THRESHOLD
+    VIGENERE_NUMPY_THRESHOLD = float('inf')
+    try:
+        loop_speed = _throughput(vigenere_encrypt, text, "KEYWORD", repeat=1)
+    finally:
+        VIGENERE_NUMPY_THRESHOLD = threshold
+    numpy_speed = _throughput(vigenere_encrypt, text, "KEYWORD")
+
+    print(f"  Per-character loop: {loop_speed:10.1f} MB/s")
+    print(f"  NumPy engine:       {numpy_speed:10.1f} MB/s")
+    print(f"  Speedup:            {numpy_speed / loop_speed:10.1f}x")
+
+def benchmark_vigenere_parallel(size_mb=64, max_workers=None):
+    """
+    Time vigenere_encrypt_parallel() with 1, 2, 4, ... worker processes
+    and print how the speedup scales with the number of cores.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"\nBenchmarking parallel Vigenère Cipher ({size_mb} MB of text, "
+          f"up to {max_workers} workers)...")
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    text = sample * (size_mb * 1024 * 1024 // len(sample))
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != max_workers:
+        worker_counts.append(max_workers)
+
+    baseline = None
+    for workers in worker_counts:
+        speed = _throughput(vigenere_encrypt_parallel, text, "KEYWORD", workers,
+                            repeat=1)
+        baseline = baseline or speed
+        print(f"  {workers:3d} worker(s): {speed:10.1f} MB/s   "
+              f"speedup {speed / baseline:5.2f}x")
+
+def benchmark_rsa_crt(bits=2048, repeat=20):
+    """
+    Compare plain RSA decryption (c^d mod n) with the CRT path and print
+    the time per decryption for each.
+    """
+    print(f"\nBenchmarking RSA decryption ({bits}-bit modulus)...")
+    public_key, private_key = rsa_generate_random_keys(bits, extended=True)
+    ciphertext = rsa_encrypt("benchmark", public_key)
+
+    timings = {}
+    for label, key in (("Plain pow(c, d, n)", private_key[:2]),
+                       ("CRT", private_key)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rsa_decrypt(ciphertext, key)
+        timings[label] = (time.perf_counter() - start) / repeat
+        print(f"  {label + ':':19s} {timings[label] * 1000:8.2f} ms")
+
+    print(f"  Speedup:            {timings['Plain pow(c, d, n)'] / timings['CRT']:8.1f}x")
+
+def benchmark_rsa_hybrid(size_mb=16, bits=2048):
+    """
+    Compare block-mode RSA with the hybrid envelope mode and print the
+    throughput of each in MB/s.
+    """
+    print(f"\nBenchmarking hybrid RSA ({bits}-bit key)...")
+    public_key, private_key = rsa_generate_random_keys(bits, extended=True)
+
+    # Block mode is so slow to decrypt that a small sample is enough
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    small = sample * (64 * 1024 // len(sample))
+    large = sample * (size_mb * 1024 * 1024 // len(sample))
+
+    def block_round_trip(text):
+        rsa_decrypt(rsa_encrypt(text, public_key, block_mode=True), private_key)
+
+    def hybrid_round_trip(text):
+        rsa_hybrid_decrypt(rsa_hybrid_encrypt(text, public_key), private_key)
+
+    block_speed = _throughput(block_round_trip, small, repeat=1)
+    hybrid_speed = _throughput(hybrid_round_trip, large)
+
+    print(f"  Block mode (encrypt + decrypt): {block_speed:10.2f} MB/s")
+    print(f"  Hybrid     (encrypt + decrypt): {hybrid_speed:10.2f} MB/s")
+
+def _extended_gcd_recursive(a, b):
+    """
+    The original recursive extended Euclidean algorithm, kept only as a
+    baseline for benchmark_mod_inverse().
+    """
+    if b == 0:
+        return (a, 1, 0)
+    g, x, y = _extended_gcd_recursive(b, a % b)
+    return (g, y, x - (a // b) * y)
+
+def benchmark_mod_inverse(count=20000, bits=1024):
+    """
+    Compare the recursive and iterative extended GCD, and one-at-a-time
+    inverses with mod_inverse_batch(), on random numbers of the given size.
+    """
+    print(f"\nBenchmarking modular inverses ({count} values, {bits}-bit modulus)...")
+    m = generate_prime(bits, workers=1)
+    values = [_random.randrange(1, m) for _ in range(count)]
+
+    timings = {}
+    for label, invert in (
+            ("Recursive extended_gcd", lambda: [_extended_gcd_recursive(v, m)[1] % m
+                                                for v in values]),
+            ("Iterative extended_gcd", lambda: [mod_inverse(v, m) for v in values]),
+            ("mod_inverse_batch", lambda: mod_inverse_batch(values, m))):
+        start = time.perf_counter()
+        invert()
+        timings[label] = time.perf_counter() - start
+        print(f"  {label + ':':24s} {timings[label] * 1e6 / count:8.2f} µs per inverse")
+
+    print(f"  Batch speedup over recursive: "
+          f"{timings['Recursive extended_gcd'] / timings['mod_inverse_batch']:.1f}x")
+
+def benchmark_caesar_crack(size_mb=1):
+    """
+    Compare caesar_crack() with the brute-force way of breaking a Caesar
+    cipher: decrypting with all 26 shifts and counting the letters of each.
+    """
+    print(f"\nBenchmarking Caesar cracking ({size_mb} MB of text)...")
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    text = caesar_encrypt(sample * (size_mb * 1024 * 1024 // len(sample)), 7)
+
+    def brute_force(cipher_text):
+        return [letter_counts(caesar_decrypt(cipher_text, shift)) for shift in range(26)]
+
+    start = time.perf_counter()
+    brute_force(text)
+    brute_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    best = caesar_crack(text)[0]['shift']
+    crack_time = time.perf_counter() - start
+
+    print(f"  Decrypt 26 times:   {brute_time * 1000:10.2f} ms")
+    print(f"  Rotated histogram:  {crack_time * 1000:10.2f} ms (found shift {best})")
+    print(f"  Speedup:            {brute_time / crack_time:10.1f}x")
+
+def benchmark_vigenere_crack(size_mb=1):
+    """
+    Time vigenere_crack() on a long ciphertext. Key-length statistics
+    come from a fixed-size sample, so the time grows only with the
+    cost of counting the letters.
+    """
+    print(f"\nBenchmarking Vigenère cracking ({size_mb} MB of text)...")
+    sample = ("It was the best of times, it was the worst of times, it was the age "
+              "of wisdom, it was the age of foolishness, it was the epoch of belief.\n")
+    text = vigenere_encrypt(sample * (size_mb * 1024 * 1024 // len(sample)), "DICKENS")
+
+    start = time.perf_counter()
+    best = vigenere_crack(text)[0]['key']
+    elapsed = time.perf_counter() - start
+    print(f"  Recovered keyword:  {best:>10s}")
+    print(f"  Time:               {elapsed * 1000:10.2f} ms")
+
+def benchmark_affine_crack(size_kb=256):
+    """
+    Compare affine_crack() with decrypting under all 312 keys and
+    scoring each decryption's letters.
+    """
+    print(f"\nBenchmarking Affine cracking ({size_kb} KB of text)...")
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    text = affine_encrypt(sample * (size_kb * 1024 // len(sample)), 17, 9)
+
+    def brute_force(cipher_text):
+        return [letter_counts(affine_decrypt(cipher_text, a, b))
+                for a in AFFINE_VALID_A for b in range(26)]
+
+    start = time.perf_counter()
+    brute_force(text)
+    brute_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    best = affine_crack(text)[0]
+    crack_time = time.perf_counter() - start
+
+    print(f"  Decrypt 312 times:  {brute_time * 1000:10.2f} ms")
+    print(f"  Permuted histogram: {crack_time * 1000:10.2f} ms (found a={best['a']}, b={best['b']})")
+    print(f"  Speedup:            {brute_time / crack_time:10.1f}x")
+
+def benchmark_quadgram_fitness(size_kb=64):
+    """
+    Time loading the quadgram table and scoring text with it.
+    """
+    print(f"\nBenchmarking quadgram fitness ({size_kb} KB of text)...")
+    sample = "The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    text = sample * (size_kb * 1024 // len(sample))
+
+    # Build a throwaway table from the sample so the benchmark doesn't
+    # depend on one having been built already
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        f".benchmark_quadgrams_{os.getpid()}.f32")
+    try:
+        build_quadgram_table(text, path)
+        start = time.perf_counter()
+        table = load_quadgram_table(path)
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        quadgram_fitness(text, table)
+        score_time = time.perf_counter() - start
+    finally:
+        _QUADGRAM_TABLES.pop(path, None)
+        os.remove(path)
+
+    print(f"  Load table:         {load_time * 1000:10.2f} ms")
+    print(f"  Score:              {score_time * 1e6 / size_kb:10.2f} µs per KB")
+
+def benchmark_frequency_analysis(size_mb=16):
+    """
+    Time counting the letters, bigrams and trigrams of a large text, fed
+    in 64 KB chunks the way /analyze reads an upload.
+    """
+    print(f"\nBenchmarking frequency analysis ({size_mb} MB of text)...")
+    sample = b"The quick brown fox jumps over the lazy dog. 1234567890!\n"
+    data = sample * (size_mb * 1024 * 1024 // len(sample))
+    chunk_size = 64 * 1024
+
+    start = time.perf_counter()
+    frequency_analysis(data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+    elapsed = time.perf_counter() - start
+
+    print(f"  Analyze:            {elapsed * 1000:10.2f} ms ({_megabytes_per_second(len(data), elapsed):.0f} MB/s)")
+
+def benchmark_batch_keyed(count=200000):
+    """
+    Compare calling affine_encrypt() once per record with encrypting all
+    the records at once, each with its own key, via cipher_batch_keyed().
+    """
+    print(f"\nBenchmarking per-record keys ({count} records)...")
+    rng = random.Random(0)
+    texts = [f"Record {i}: the quick brown fox"[:rng.randint(8, 32)] for i in range(count)]
+    keys = [(rng.choice(AFFINE_VALID_A), rng.randrange(26)) for _ in range(count)]
+
+    start = time.perf_counter()
+    [affine_encrypt(text, a, b) for text, (a, b) in zip(texts, keys)]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows, lengths = pack_rows(texts)
+    pack_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = affine_rows(rows, [a for a, _ in keys], [b for _, b in keys])
+    rows_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    unpack_rows(rows, lengths)
+    unpack_time = time.perf_counter() - start
+    batch_time = pack_time + rows_time + unpack_time
+
+    print(f"  One call per record:{loop_time * 1000:10.2f} ms")
+    print(f"  Pack rows:          {pack_time * 1000:10.2f} ms")
+    print(f"  Encrypt rows:       {rows_time * 1000:10.2f} ms")
+    print(f"  Unpack rows:        {unpack_time * 1000:10.2f} ms")
+    print(f"  Speedup:            {loop_time / batch_time:10.1f}x")
+
+def benchmark_key_objects(count=100000):
+    """
+    Compare calling the module functions (which look up or compile the
+    key on every call) with reusing one compiled key object, on many
+    short messages.
+    """
+    print(f"\nBenchmarking compiled keys ({count} short messages)...")
+    text = "Attack at dawn, hold the bridge!"
+
+    for label, function, args, key in (
+            ("Caesar", caesar_encrypt, (3,), CaesarKey(3)),
+            ("Vigenère", vigenere_encrypt, ("LEMON",), VigenereKey("LEMON")),
+            ("Affine", affine_encrypt, (5, 8), AffineKey(5, 8))):
+        start = time.perf_counter()
+        for _ in range(count):
+            function(text, *args)
+        function_time = time.perf_counter() - start
+
+        encrypt = key.encrypt
+        start = time.perf_counter()
+        for _ in range(count):
+            encrypt(text)
+        key_time = time.perf_counter() - start
+
+        print(f"  {label + ':':<20}{function_time * 1e6 / count:6.2f} µs per call, "
+              f"{key_time * 1e6 / count:6.2f} µs with a compiled key")
+
+def benchmark_rsa_keyring(bits=3072, repeat=20):
+    """
+    Compare decrypting with a key posted as decimal strings against a key
+    looked up by ID in an RSAKeyring. Both keys carry their CRT values
+    (see benchmark_rsa_crt for what those are worth), so the difference
+    is only the parsing and checking a posted key needs on every request.
+    """
+    print(f"\nBenchmarking RSA keyring ({bits}-bit key, {repeat} decryptions)...")
+    public_key, private_key = rsa_generate_random_keys(bits, extended=True)
+    posted = [str(value) for value in private_key] # d, n, p, q, dp, dq, qinv
+    ciphertext = rsa_encrypt("keyring", public_key)
+    keyring = RSAKeyring()
+    key_id = keyring.add(public_key, private_key)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rsa_decrypt(ciphertext, RSAKey(*map(int, posted)))
+    posted_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rsa_decrypt(ciphertext, keyring.get(key_id)[1])
+    keyring_time = (time.perf_counter() - start) / repeat
+
+    print(f"  Posted CRT key:     {posted_time * 1000:10.2f} ms per decryption")
+    print(f"  Keyring key ID:     {keyring_time * 1000:10.2f} ms per decryption")
+    print(f"  Speedup:            {posted_time / keyring_time:10.1f}x")
+
+def run_benchmarks():
+    """
+    Run every benchmark in this file.
+    """
+    print("⏱️ RUNNING CIPHER BENCHMARKS")
+    print("=" * 50)
+    benchmark_caesar()
+    benchmark_caesar_crack()
+    benchmark_vigenere()
+    benchmark_vigenere_parallel()
+    benchmark_batch_keyed()
+    benchmark_key_objects()
+    benchmark_vigenere_crack()
+    benchmark_affine_crack()
+    benchmark_quadgram_fitness()
+    benchmark_frequency_analysis()
+    benchmark_rsa_crt()
+    benchmark_rsa_hybrid()
+    benchmark_rsa_keyring()
+    benchmark_mod_inverse()
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+# Files are encrypted through a memory map this many bytes at a time, so
+# only one window is ever copied into Python memory
+CLI_WINDOW_SIZE = 16 * 1024 * 1024
+
+def _parse_cli_key(cipher, text):
+    """
+    Turn the KEY argument into the key each cipher expects:
+    "3" (caesar), "LEMON" (vigenere), "5,8" (affine), "e,n" or "d,n" (rsa).
+    """
+    if cipher == 'vigenere':
+        if not text.isalpha():
+            raise ValueError("Keyword must contain only letters!")
+        return text
+
+    try:
+        parts = [int(part) for part in text.split(',')]
+    except ValueError:
+        raise ValueError(f"The {cipher} key must be made of whole numbers") from None
+    if cipher == 'caesar':
+        if len(parts) != 1:
+            raise ValueError("The caesar key must be a single number")
+        return parts[0]
+    if len(parts) != 2:
+        raise ValueError(f"The {cipher} key must be two numbers separated by a comma")
+    if cipher == 'affine':
+        _affine_key(*parts) # Raises ValueError if 'a' isn't coprime with 26
+    return tuple(parts)
+
+def cipher_file(cipher, op, key, source, destination, window_size=None, progress=None):
+    """
+    FILE ENCRYPTION / DECRYPTION
+    ============================
+    
+    Encrypt or decrypt the file at source, writing the result to
+    destination. Returns the number of bytes read.
+    
+    For the classical ciphers both files are memory-mapped and processed
+    one memoryview window at a time, each window going into the matching
+    window of the output map. The results are written straight into the
+    output map, except for Caesar and affine without NumPy, which copy
+    each 64 KB block once because bytes.translate() needs bytes (see the
+    BYTES section).
+    A multi-GB file never has to fit in memory: the operating system
+    pages it in and out as needed. The output is exactly as long as the
+    input.
+    
+    RSA has no byte-for-byte form, so the file is read whole and written
+    in the "<length>:<base64>" block format (see rsa_encrypt).
+    
+    progress, if given, is called as progress(bytes_done, bytes_total)
+    after every window.
+    
+    Raises ValueError if destination is the source file itself: opening
+    it for writing would wipe the input before it is read.
+    """
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        raise ValueError(f"Output {destination} is the input file - choose another output")
+
+    if cipher == 'rsa':
+        with open(source, 'rb') as src:
+            data = src.read()
+        if op == 'encrypt':
+            result = rsa_encrypt(data, key, block_mode=True)
+        else:
+            result = rsa_decrypt(data.decode('ascii').strip(), key)
+        with open(destination, 'wb') as dst:
+            dst.write(result.encode() if isinstance(result, str) else result)
+        if progress:
+            progress(len(data), len(data))
+        return len(data)
+
+    window_size = window_size or CLI_WINDOW_SIZE
+    size = os.path.getsize(source)
+    with open(source, 'rb') as src, open(destination, 'w+b') as dst:
+        if size == 0: # Empty files can't be memory-mapped (and need no work)
+            return 0
+        dst.truncate(size)
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as in_map, \
+             mmap.mmap(dst.fileno(), size) as out_map:
+            apply = _bytes_transformer(cipher, op, key)
+            with memoryview(in_map) as in_view, memoryview(out_map) as out_view:
+                for start in range(0, size, window_size):
+                    stop = min(start + window_size, size)
+                    apply(in_view[start:stop], out_view[start:stop])
+                    if progress:
+                        progress(stop, size)
+    return size
+
+def _cipher_file_job(cipher, op, key, source, destination):
+    """
+    Encrypt one file in a worker process and time it.
+    """
+    start = time.perf_counter()
+    size = cipher_file(cipher, op, key, source, destination)
+    return source, size, time.perf_counter() - start
+
+def _cli_jobs(source, destination, op):
+    """
+    List (source, destination) file pairs. A directory is walked and its
+    layout recreated under the destination directory. Raises ValueError
+    if the output is the input itself.
+    """
+    if not os.path.isdir(source):
+        destination = destination or f"{source}.{op}ed"
+        if os.path.exists(destination) and os.path.samefile(source, destination):
+            raise ValueError(f"Output {destination} is the input file - choose another output")
+        return [(source, destination)]
+
+    destination = destination or f"{source.rstrip(os.sep)}-{op}ed"
+    output = os.path.realpath(destination)
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        raise ValueError(f"Output {destination} is the input directory - choose another output")
+    jobs = []
+    for folder, dirs, names in os.walk(source):
+        # Don't walk into the output directory if it is inside the input
+        dirs[:] = [name for name in dirs
+                   if os.path.realpath(os.path.join(folder, name)) != output]
+        target = os.path.join(destination, os.path.relpath(folder, source))
+        os.makedirs(target, exist_ok=True)
+        for name in sorted(names):
+            jobs.append((os.path.join(folder, name), os.path.join(target, name)))
+    return jobs
+
+def _megabytes_per_second(size, seconds):
+    return size / 1e6 / max(seconds, 1e-9)
+
+def main(argv=None):
+    """
+    COMMAND LINE BULK ENCRYPTOR
+    ===========================
+    
+        python -m ciphers encrypt caesar 3 notes.txt -o notes.enc
+        python -m ciphers decrypt vigenere LEMON notes.enc
+        python -m ciphers encrypt affine 5,8 letters/ -o letters-enc/ -w 4
+        python -m ciphers encrypt rsa 65537,<n> secret.txt
+    
+    INPUT may be a file or a directory. Directories are walked and their
+    files shared out over a pool of worker processes. Progress and
+    throughput go to stderr so stdout stays clean for scripts.
+    
+    With no arguments the module still runs its tests, and
+    "python -m ciphers benchmark" runs the benchmarks.
+    """
+    parser = argparse.ArgumentParser(prog="python -m ciphers",
+                                     description="Encrypt or decrypt files and directories.")
+    parser.add_argument('op', choices=('encrypt', 'decrypt'))
+    parser.add_argument('cipher', choices=CIPHERS)
+    parser.add_argument('key', help='3 (caesar), LEMON (vigenere), 5,8 (affine), e,n or d,n (rsa)')
+    parser.add_argument('input', help='file or directory to process')
+    parser.add_argument('-o', '--output', help='output file or directory (default: '
+                        'INPUT.encrypted or INPUT.decrypted for a file, '
+                        'INPUT-encrypted or INPUT-decrypted for a directory)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='worker processes for directories (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    try:
+        key = _parse_cli_key(args.cipher, args.key)
+    except ValueError as e:
+        parser.error(str(e))
+    if not os.path.exists(args.input):
+        parser.error(f"{args.input} does not exist")
+
+    try:
+        jobs = _cli_jobs(args.input, args.output, args.op)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    total = 0
+
+    if len(jobs) == 1 and not os.path.isdir(args.input):
+        source, destination = jobs[0]
+
+        def progress(done, size):
+            print(f"\r{source}: {done * 100 // size:3d}% "
+                  f"({_megabytes_per_second(done, time.perf_counter() - start):.1f} MB/s)",
+                  end='', file=sys.stderr, flush=True)
+
+        total = cipher_file(args.cipher, args.op, key, source, destination, progress=progress)
+        print(file=sys.stderr)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(_cipher_file_job, args.cipher, args.op, key, *job)
+                       for job in jobs]
+            for finished, future in enumerate(as_completed(futures), 1):
+                source, size, seconds = future.result()
+                total += size
+                print(f"[{finished}/{len(jobs)}] {source}: {size:,} bytes "
+                      f"({_megabytes_per_second(size, seconds):.1f} MB/s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    print(f"{args.op.capitalize()}ed {len(jobs)} file(s), {total:,} bytes in {elapsed:.2f}s "
+          f"({_megabytes_per_second(total, elapsed):.1f} MB/s)", file=sys.stderr)
+    return 0
+
 # Update the existing test function call
 if __name__ == "__main__":
-    run_comprehensive_tests()
+    if sys.argv[1:] == ["benchmark"]:
+        run_benchmarks()
+    elif sys.argv[1:]:
+        sys.exit(main())
+    else:
+        run_comprehensive_tests()